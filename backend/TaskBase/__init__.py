@@ -1,4 +1,5 @@
-from .models import Base, engine, SessionLocal
+from .models import Base, engine, SessionLocal, ReadSessionLocal, configure_database, get_engine
+from .migrations import run_migrations
 from dotenv import load_dotenv
 import os
 
@@ -6,5 +7,6 @@ load_dotenv()
 DEPARTMENT_NAME = os.getenv("DEPARTMENT_NAME", "Отдел не указан")
 
 def init_db():
-    """Создаёт таблицы в БД, если они не существуют."""
-    Base.metadata.create_all(bind=engine)
+    """Создаёт таблицы в БД, если они не существуют, и применяет миграции схемы."""
+    Base.metadata.create_all(bind=get_engine())
+    run_migrations(get_engine())
@@ -0,0 +1,46 @@
+"""Async-движок SQLAlchemy для режима DB_ASYNC.
+
+Драйверы: aiosqlite для SQLite, asyncpg для PostgreSQL. Отдельных
+async-версий функций logic нет: routers/aio.py выполняет sync-обработчики
+целиком через AsyncSession.run_sync. Асинхронен только обмен с драйвером,
+ORM-работа, расчёт баллов и сериализация ответа идут синхронно в event loop,
+поэтому тяжёлый запрос задерживает и остальные запросы этого воркера.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from TaskBase.models import DATABASE_URL, attach_sqlite_pragmas
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+async_engine = None
+# expire_on_commit=False: после commit атрибуты не должны подгружаться лениво вне greenlet
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
+def to_async_url(url: str) -> str:
+    """sqlite:///db.db -> sqlite+aiosqlite:///db.db; URL с явным драйвером не меняется."""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        return url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def configure_async_database(url: str = DATABASE_URL, sqlite_pragmas: dict | None = None, **pool_options) -> None:
+    """Создаёт async-движок (тот же профиль PRAGMA и пула, что и у sync) и привязывает AsyncSessionLocal."""
+    global async_engine
+    async_url = to_async_url(url)
+    in_memory = async_url.startswith("sqlite") and ":memory:" in async_url
+    async_engine = create_async_engine(async_url, **({} if in_memory else pool_options))
+    if async_url.startswith("sqlite"):
+        attach_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas or {})
+    AsyncSessionLocal.configure(bind=async_engine)
+
+
+async def dispose_async_database() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
+
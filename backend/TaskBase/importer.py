@@ -0,0 +1,404 @@
+"""Импорт исторических задач из CSV / NDJSON / JSON.
+
+    python -m TaskBase.importer tasks.csv
+    python -m TaskBase.importer tasks.ndjson --chunk-size 5000 --dry-run
+
+Поля строки: name, description, created_date, deadline, completed_date,
+difficulty, status (необязательно), executors (имена сотрудников через ";"
+в CSV или список в JSON), project и stage (имена, необязательно).
+
+Файл читается потоково (JSON-массив — по одному элементу), строки
+валидируются и вставляются пачками по chunk_size, каждая пачка — отдельная
+транзакция вместе со своим вкладом в леджер баллов. Исполнители ищутся по
+имени; отсутствующий проект создаётся по шаблону add_project_with_stages в
+транзакции пачки, его даты и статус выводятся из импортированных задач. Этап
+ищется по имени среди этапов проекта.
+
+Если файл не читается дальше (не UTF-8, битый JSON-массив или CSV), импорт
+останавливается: уже записанные пачки остаются, причина — в report.error.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from itertools import islice
+from types import SimpleNamespace
+from typing import Iterable, Iterator, Optional
+
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
+from sqlalchemy import insert, update
+
+from TaskBase.logic import PROJECT_STAGE_NAMES, add_project_with_stages, apply_score_delta, insert_many, snapshot_task_score
+from TaskBase.models import Employee, Project, ProjectStage, Task, TaskExecutor
+
+FORMATS = ("csv", "ndjson", "json")
+TASK_STATUSES = ("в работе", "выполнено", "просрочено")
+MAX_REPORTED_ERRORS = 100
+# размер куска, которым читается JSON-массив
+JSON_READ_SIZE = 64 * 1024
+
+
+class ImportRow(BaseModel):
+    name: str = Field(min_length=1)
+    description: str = ""
+    created_date: date
+    deadline: date
+    completed_date: Optional[date] = None
+    difficulty: int = Field(ge=1, le=4)
+    status: Optional[str] = None
+    executors: list[str] = []
+    project: Optional[str] = None
+    stage: Optional[str] = None
+
+    @field_validator("completed_date", "status", "project", "stage", mode="before")
+    @classmethod
+    def empty_to_none(cls, value):
+        return None if value == "" else value
+
+    @field_validator("executors", mode="before")
+    @classmethod
+    def split_executors(cls, value):
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(";") if name.strip()]
+        return value
+
+    @model_validator(mode="after")
+    def check_status(self):
+        if self.status is None:
+            # статус выводится так же, как его выставляют приложение и планировщик
+            if self.completed_date:
+                self.status = "выполнено"
+            elif self.deadline < date.today():
+                self.status = "просрочено"
+            else:
+                self.status = "в работе"
+        elif self.status not in TASK_STATUSES:
+            raise ValueError(f"status must be one of: {', '.join(TASK_STATUSES)}")
+        if self.status == "выполнено" and not self.completed_date:
+            raise ValueError("completed_date is required for completed tasks")
+        if self.stage and not self.project:
+            raise ValueError("stage requires project")
+        return self
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    projects_created: int = 0
+    seconds: float = 0.0
+    rows_per_sec: float = 0.0
+    dry_run: bool = False
+    error: Optional[str] = None  # чтение файла остановлено
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row: int, errors: list) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def read_rows(stream, fmt: str) -> Iterator[dict]:
+    """Строки файла как словари. stream — текстовый поток."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "ndjson":
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # битая строка уходит в валидацию и попадает в ошибки отчёта
+                yield line
+    elif fmt == "json":
+        yield from _json_array(stream)
+    else:
+        raise ValueError(f"unknown format: {fmt}")
+
+
+def _json_array(stream, read_size: int = JSON_READ_SIZE) -> Iterator:
+    """Элементы JSON-массива верхнего уровня по одному, без чтения файла целиком."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def next_char() -> str:
+        # первый непробельный символ с позиции pos (дочитывая поток); "" — конец файла
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos] if pos < len(buffer) else ""
+            chunk = stream.read(read_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+    def finish() -> None:
+        nonlocal pos
+        pos += 1
+        if next_char():
+            raise json.JSONDecodeError("extra data after the array", buffer, pos)
+
+    if next_char() != "[":
+        raise json.JSONDecodeError("expected a JSON array", buffer, pos)
+    pos += 1
+    if next_char() == "]":
+        finish()
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # число на границе куска могло быть прочитано не целиком («1.» из «1.5»)
+                cut = end == len(buffer) or (
+                    isinstance(item, (int, float)) and buffer[end] in "0123456789.eE+-"
+                )
+                if not cut or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            chunk = stream.read(read_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+        pos = end
+        yield item
+        separator = next_char()
+        if separator == "]":
+            finish()
+            return
+        if separator != ",":
+            raise json.JSONDecodeError("expected ',' or ']'", buffer, pos)
+        pos += 1
+
+
+def _guarded(rows: Iterable[dict], report: ImportReport) -> Iterator[dict]:
+    # ошибка чтения файла останавливает импорт, но не теряет уже прочитанные строки
+    read = 0
+    try:
+        for read, row in enumerate(rows, start=1):
+            yield row
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        report.error = f"cannot read record {read + 1}: {e}"
+
+
+def detect_format(filename: str) -> str:
+    suffix = filename.rsplit(".", 1)[-1].lower()
+    if suffix in FORMATS:
+        return suffix
+    if suffix == "jsonl":
+        return "ndjson"
+    raise ValueError(f"cannot detect format of {filename}; use one of: {', '.join(FORMATS)}")
+
+
+class _Resolver:
+    """Кэш имён сотрудников, проектов и этапов на время импорта."""
+
+    def __init__(self, session):
+        self.session = session
+        self.employees: dict[str, list[int]] = {}
+        for employee_id, name in session.query(Employee.id, Employee.name):
+            self.employees.setdefault(name, []).append(employee_id)
+        self.projects = {name: project_id for project_id, name in session.query(Project.id, Project.name)}
+        self.stages = {
+            (project_id, name): stage_id
+            for stage_id, project_id, name in session.query(ProjectStage.id, ProjectStage.project_id, ProjectStage.name)
+        }
+        self.projects_created = 0
+        # созданные импортом проекты: id -> (первая created_date, последний deadline,
+        # последняя completed_date, все ли задачи выполнены)
+        self.created: dict[int, Optional[tuple]] = {}
+        self._touched: set[int] = set()
+
+    def executor_ids(self, names: list[str]) -> tuple[list[int], list[str]]:
+        ids, errors = [], []
+        for name in names:
+            found = self.employees.get(name, [])
+            if len(found) == 1:
+                ids.append(found[0])
+            elif not found:
+                errors.append(f"employee not found: {name}")
+            else:
+                errors.append(f"employee name is ambiguous: {name}")
+        return list(dict.fromkeys(ids)), errors
+
+    def project_and_stage(self, row: ImportRow, create: bool) -> tuple[Optional[int], Optional[int], Optional[str]]:
+        """(project_id, stage_id, ошибка). Новый проект создаётся, только если строка без ошибок."""
+        if row.project is None:
+            return None, None, None
+        if row.project not in self.projects:
+            if row.stage is not None and row.stage not in PROJECT_STAGE_NAMES:
+                return None, None, f"stage not found in project {row.project}: {row.stage}"
+            if not create:
+                # dry-run: проект был бы создан, этапы — по шаблону
+                return None, None, None
+            # без commit: проект записывается вместе с задачами своей пачки
+            project = add_project_with_stages(self.session, row.project, "", row.deadline, commit=False)
+            self.projects[project.name] = project.id
+            for stage in project.stages:
+                self.stages[(project.id, stage.name)] = stage.id
+            self.created[project.id] = None
+            self.projects_created += 1
+
+        project_id = self.projects[row.project]
+        stage_id = None
+        if row.stage is not None:
+            stage_id = self.stages.get((project_id, row.stage))
+            if stage_id is None:
+                return None, None, f"stage not found in project {row.project}: {row.stage}"
+        return project_id, stage_id, None
+
+    def track(self, project_id: Optional[int], row: ImportRow) -> None:
+        """Учитывает принятую задачу в датах проекта, созданного импортом."""
+        if project_id not in self.created:
+            return
+        self._touched.add(project_id)
+        done = row.completed_date is not None
+        if self.created[project_id] is None:
+            self.created[project_id] = (row.created_date, row.deadline, row.completed_date, done)
+            return
+        created, deadline, completed, all_done = self.created[project_id]
+        self.created[project_id] = (
+            min(created, row.created_date),
+            max(deadline, row.deadline),
+            max(filter(None, (completed, row.completed_date)), default=None),
+            all_done and done,
+        )
+
+    def update_created_projects(self) -> None:
+        """Даты и статус созданных проектов, получивших задачи в этой пачке, — по их задачам."""
+        today = date.today()
+        for project_id in self._touched:
+            created, deadline, completed, all_done = self.created[project_id]
+            if all_done:
+                status = "завершен"
+            else:
+                completed = None
+                status = "просрочено" if deadline < today else "в работе"
+            self.session.execute(
+                update(Project).where(Project.id == project_id)
+                .values(created_date=created, deadline=deadline, completed_date=completed, status=status)
+            )
+        self._touched.clear()
+
+
+def import_tasks(session, rows: Iterable[dict], chunk_size: int = 1000, dry_run: bool = False, progress=None) -> ImportReport:
+    """Импортирует задачи пачками по chunk_size строк, commit после каждой пачки.
+
+    progress(report) вызывается после каждой пачки. Строки с ошибками
+    пропускаются и попадают в report.errors (первые MAX_REPORTED_ERRORS,
+    row — номер записи в файле, с 1, без заголовка CSV).
+    """
+    report = ImportReport(dry_run=dry_run)
+    resolver = _Resolver(session)
+    started = time.perf_counter()
+    numbered = enumerate(_guarded(rows, report), start=1)
+
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        tasks, links = [], []
+        for line, raw in chunk:
+            report.rows += 1
+            try:
+                row = ImportRow.model_validate(raw)
+            except ValidationError as e:
+                report.add_error(line, [f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()])
+                continue
+
+            executor_ids, errors = resolver.executor_ids(row.executors)
+            if errors:
+                report.add_error(line, errors)
+                continue
+            project_id, stage_id, error = resolver.project_and_stage(row, create=not dry_run)
+            if error:
+                report.add_error(line, [error])
+                continue
+            resolver.track(project_id, row)
+
+            tasks.append({
+                "name": row.name,
+                "description": row.description,
+                "created_date": row.created_date,
+                "deadline": row.deadline,
+                "completed_date": row.completed_date,
+                "difficulty": row.difficulty,
+                "status": row.status,
+                "project_id": project_id,
+                "stage_id": stage_id,
+            })
+            links.append(executor_ids)
+
+        if tasks and not dry_run:
+            resolver.update_created_projects()
+            _insert_chunk(session, tasks, links)
+        report.imported += len(tasks)
+
+        report.projects_created = resolver.projects_created
+        report.seconds = time.perf_counter() - started
+        report.rows_per_sec = report.rows / report.seconds if report.seconds else 0.0
+        if progress is not None:
+            progress(report)
+
+    session.rollback()
+    return report
+
+
+def _insert_chunk(session, tasks: list[dict], links: list[list[int]]) -> None:
+    ids = insert_many(session, Task, tasks)
+    executor_rows = [
+        {"task_id": task_id, "employee_id": employee_id}
+        for task_id, employee_ids in zip(ids, links)
+        for employee_id in employee_ids
+    ]
+    if executor_rows:
+        session.execute(insert(TaskExecutor), executor_rows)
+
+    # вклад в леджер считается по тем же правилам, что и для задач в БД
+    contribution = Counter()
+    for task, employee_ids in zip(tasks, links):
+        contribution.update(snapshot_task_score(SimpleNamespace(**task, executor_ids=employee_ids)))
+    apply_score_delta(session, Counter(), contribution)
+    session.commit()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m TaskBase.importer", description="Импорт задач")
+    parser.add_argument("path", help="CSV, NDJSON (.ndjson/.jsonl) или JSON-массив")
+    parser.add_argument("--format", choices=FORMATS, help="по умолчанию — по расширению файла")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="только проверить строки, ничего не записывать")
+    args = parser.parse_args(argv)
+
+    from TaskBase import init_db
+    from TaskBase.logic import get_session
+
+    fmt = args.format or detect_format(args.path)
+    init_db()
+
+    def progress(report: ImportReport) -> None:
+        print(f"{report.rows} строк, импортировано {report.imported}, ошибок {report.failed}, "
+              f"{report.rows_per_sec:.0f} строк/с", file=sys.stderr)
+
+    with open(args.path, encoding="utf-8-sig", newline="") as stream, get_session() as session:
+        report = import_tasks(session, read_rows(stream, fmt), args.chunk_size, args.dry_run, progress)
+
+    for error in report.errors:
+        print(f"строка {error['row']}: {'; '.join(error['errors'])}")
+    if report.error:
+        print(f"импорт остановлен: {report.error}")
+    print(json.dumps({k: v for k, v in report.as_dict().items() if k != "errors"}, ensure_ascii=False))
+    return 1 if report.failed or report.error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
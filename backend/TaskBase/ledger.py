@@ -0,0 +1,33 @@
+"""Обслуживание леджера баллов.
+
+    python -m TaskBase.ledger rebuild   # пересчитать леджер с нуля
+    python -m TaskBase.ledger check     # сверить леджер с полным пересчётом
+"""
+import argparse
+import sys
+
+from TaskBase import init_db
+from TaskBase.logic import check_score_ledger, get_session, rebuild_score_ledger
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m TaskBase.ledger", description="Леджер баллов")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    init_db()
+    with get_session() as session:
+        if args.command == "rebuild":
+            rows = rebuild_score_ledger(session)
+            print(f"Леджер перестроен: {rows} строк")
+            return 0
+
+        mismatches = check_score_ledger(session)
+        for m in mismatches:
+            print(f"{m['ledger']} id={m['id']} day={m['day']}: ожидалось {m['expected']}, в леджере {m['actual']}")
+        print("Леджер согласован" if not mismatches else f"Расхождений: {len(mismatches)}")
+        return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,20 @@
-from datetime import datetime, date
-from sqlalchemy import create_engine, func, case, update, and_, null
-from sqlalchemy.orm import sessionmaker
-from TaskBase.models import Employee, Project, ProjectStage, Task, SessionLocal
+from datetime import datetime, date, timedelta
+from sqlalchemy import create_engine, event, func, cast, update, insert, select, and_, or_, null, tuple_, Integer, Date
+from sqlalchemy.orm import sessionmaker, selectinload, joinedload, noload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from TaskBase.models import (
+    Employee, Project, ProjectStage, Task, TaskExecutor,
+    EmployeeScore, ProjectScore, SessionLocal, ReadSessionLocal,
+)
+from TaskBase.pagination import keyset_page, only_fields, to_fields
+from TaskBase.scoring import ledger_contribution, load_task_columns, score_tasks
 from typing import Optional, List
+from collections import Counter
+from dataclasses import dataclass, field
 import math
+import time
 
 # Employee functions
 def add_employee(session, name: str, position: str, start_date: date) -> Employee:
@@ -12,20 +23,36 @@ def add_employee(session, name: str, position: str, start_date: date) -> Employe
     session.commit()
     return employee
 
+def add_employees(session, items: list[dict]) -> list[int]:
+    """Пакетное добавление сотрудников одним INSERT (executemany) и одним commit.
+
+    items — словари с name, position, start_date. Возвращает id в порядке items.
+    """
+    if not items:
+        return []
+    ids = insert_many(session, Employee, [{"status": "работает", **item} for item in items])
+    session.commit()
+    return ids
+
 def get_all_employees(session):
     employees = session.query(Employee).order_by(Employee.name).all()
     return employees
 
+def list_employees(session, fields: Optional[List[str]] = None, limit: Optional[int] = None, cursor: Optional[str] = None):
+    q = session.query(Employee).order_by(Employee.name)
+    return _list_page(q, Employee, fields, limit, cursor, [Employee.name, Employee.id])
+
 def get_employee(session, id):
     employee = session.query(Employee).filter(Employee.id == id).first()
     return employee
 
 def get_top_employees(session, from_date: date, to_date: date, top_n: int = 3):
     employees = session.query(Employee).all()
+    table = build_employee_score_table(session, from_date, to_date)
     scored = [
         {
             "employee": emp,
-            "score": get_employee_score(session, emp.id, from_date, to_date)
+            "score": table.get(emp.id, 0)
         }
         for emp in employees
     ]
@@ -33,62 +60,81 @@ def get_top_employees(session, from_date: date, to_date: date, top_n: int = 3):
     return scored[:top_n]
 
 def get_employee_score(session, employee_id: int, from_date: date, to_date: date) -> int:
-    tasks = session.query(Task).filter(
-        Task.completed_date != None,
-        Task.completed_date >= from_date,
-        Task.completed_date <= to_date
-    ).all()
-
-    total = 0
-    for task in tasks:
-        if employee_id in parse_executor_ids(task):
-            total += calculate_task_score(task)
-    return total
+    total = session.query(func.sum(EmployeeScore.score)).filter(
+        EmployeeScore.employee_id == employee_id,
+        EmployeeScore.day >= from_date,
+        EmployeeScore.day <= to_date,
+    ).scalar()
+    return total or 0
+
+def build_employee_score_table(session, from_date: date, to_date: date) -> dict[int, int]:
+    """Баллы всех сотрудников за период одним сгруппированным запросом к леджеру.
+
+    Возвращает словарь {employee_id: баллы}; сотрудники без выполненных задач
+    в словарь не попадают.
+    """
+    rows = session.query(
+        EmployeeScore.employee_id,
+        func.sum(EmployeeScore.score),
+    ).filter(
+        EmployeeScore.day >= from_date,
+        EmployeeScore.day <= to_date,
+    ).group_by(EmployeeScore.employee_id).all()
+    return {employee_id: total for employee_id, total in rows}
+
+def get_employee_scores(session, employee_ids: Optional[List[int]], from_date: date, to_date: date) -> dict[int, int]:
+    """Баллы сотрудников за период одним сгруппированным запросом.
+
+    employee_ids=None — все сотрудники. Сотрудники без баллов получают 0.
+    """
+    q = session.query(
+        Employee.id,
+        func.coalesce(func.sum(EmployeeScore.score), 0),
+    ).outerjoin(
+        EmployeeScore,
+        and_(
+            EmployeeScore.employee_id == Employee.id,
+            EmployeeScore.day >= from_date,
+            EmployeeScore.day <= to_date,
+        ),
+    )
+    if employee_ids is not None:
+        q = q.filter(Employee.id.in_(employee_ids))
+    return {employee_id: total for employee_id, total in q.group_by(Employee.id).order_by(Employee.id)}
 
 def get_employee_tasks(db: SessionLocal, employee_id: int, from_date: date, to_date: date):
-    today = date.today()
+    return employee_tasks_query(db, employee_id, from_date, to_date).all()
+
+def employee_tasks_query(db: SessionLocal, employee_id: int, from_date: date, to_date: date):
     q = db.query(Task)
-    
-    q = q.filter(Task.created_date <= to_date)
-
-    effective_end = func.coalesce(
-        case(
-            (Task.status == "в работе", Task.deadline),
-            (Task.status == "просрочено", today),
-            else_=case(
-                (Task.deadline >= Task.completed_date, Task.deadline),
-                (Task.deadline < Task.completed_date, Task.completed_date),
-            )
-        ),
-        today
-    )
-    q = q.filter(effective_end >= from_date)
-    q = q.filter(Task.executor_ids.like(f"%{employee_id}%"))
-    return q.all()
-    # return db.query(Task).filter(
-    #     Task.executor_ids.like(f"%{employee_id}%"),
-    #     Task.created_date >= from_date,
-    #     Task.created_date <= to_date
-    # ).all()
+    q = q.filter(in_period(Task, from_date, to_date))
+    q = q.join(TaskExecutor, TaskExecutor.task_id == Task.id)
+    q = q.filter(TaskExecutor.employee_id == employee_id)
+    return q
 
 # Project functions
-def add_project_with_stages(session: SessionLocal, name: str, desc: str, deadline: date):
+# этапы, с которыми создаётся каждый проект
+PROJECT_STAGE_NAMES = (
+    "Техническое задание", "Первичный концепт", "Финальный концепт",
+    "Первичная спецификация", "Цифровой двойник", "Сборка и монтаж",
+    "Разработка ПО", "Пуско-наладочные работы", "Подготовка документации",
+    "Обучение персонала и поддержка",
+)
+
+def add_project_with_stages(session: SessionLocal, name: str, desc: str, deadline: date, commit: bool = True):
+    """Проект с этапами по шаблону. commit=False — только flush, транзакцию завершает вызывающий."""
     project = Project(name=name, description=desc,  deadline=deadline)
     session.add(project)
-    session.commit()
-
-    stage_names = [
-        "Техническое задание", "Первичный концепт", "Финальный концепт",
-        "Первичная спецификация", "Цифровой двойник", "Сборка и монтаж",
-        "Разработка ПО", "Пуско-наладочные работы", "Подготовка документации",
-        "Обучение персонала и поддержка"
-    ]
+    session.flush()
 
-    for stage_name in stage_names:
+    for stage_name in PROJECT_STAGE_NAMES:
         stage = ProjectStage(name=stage_name, project_id=project.id)
         session.add(stage)
 
-    session.commit()
+    if commit:
+        session.commit()
+    else:
+        session.flush()
     return project
 
 def add_project(session, name: str, deadline: date | None = None) -> Project:
@@ -115,23 +161,32 @@ def get_project_name(session, id):
     return project.name
 
 def get_project_score(session, project_id: int, from_date: date, to_date: date) -> int:
-    tasks = session.query(Task).filter(
-        Task.project_id == project_id,
-        Task.completed_date.isnot(None),
-        Task.completed_date >= from_date,
-        Task.completed_date <= to_date,
-    ).all()
-
-    total = 0
-    for task in tasks:
-        base = calculate_task_score(task)
-        # считаем исполнителей (на всякий случай убираем дубли)
-        n_exec = len(set(parse_executor_ids(task)))
-        # если исполнителей нет, считаем как 1, чтобы не обнулять балл выполненной задачи
-        multiplier = n_exec if n_exec > 0 else 1
-        total += base * multiplier
-
-    return total
+    total = session.query(func.sum(ProjectScore.score)).filter(
+        ProjectScore.project_id == project_id,
+        ProjectScore.day >= from_date,
+        ProjectScore.day <= to_date,
+    ).scalar()
+    return total or 0
+
+def get_project_scores(session, project_ids: Optional[List[int]], from_date: date, to_date: date) -> dict[int, int]:
+    """Баллы проектов за период одним сгруппированным запросом.
+
+    project_ids=None — все проекты. Проекты без баллов получают 0.
+    """
+    q = session.query(
+        Project.id,
+        func.coalesce(func.sum(ProjectScore.score), 0),
+    ).outerjoin(
+        ProjectScore,
+        and_(
+            ProjectScore.project_id == Project.id,
+            ProjectScore.day >= from_date,
+            ProjectScore.day <= to_date,
+        ),
+    )
+    if project_ids is not None:
+        q = q.filter(Project.id.in_(project_ids))
+    return {project_id: total for project_id, total in q.group_by(Project.id).order_by(Project.id)}
 
 def get_filtered_projects(
     db: SessionLocal,
@@ -140,52 +195,128 @@ def get_filtered_projects(
     query: Optional[str] = None,
     status: Optional[str] = None,
 ):
-    today = date.today()
+    return filtered_projects_query(db, from_date, to_date, query, status).all()
+
+def filtered_projects_query(
+    db: SessionLocal,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    query: Optional[str] = None,
+    status: Optional[str] = None,
+):
     q = db.query(Project)
 
     if from_date and to_date:
-        q = q.filter(Project.created_date <= to_date)
-
-        # CASE: конечная дата проекта
-        effective_end = func.coalesce(
-            case(
-                (Project.status == "в работе", Project.deadline),
-                (Project.status == "просрочено", today),
-                else_=case(
-                    (Project.deadline >= Project.completed_date, Project.deadline),
-                    (Project.deadline < Project.completed_date, Project.completed_date),
-                )
-            ),
-            today
-        )
-
-        q = q.filter(effective_end >= from_date)
-
+        q = q.filter(in_period(Project, from_date, to_date))
     if query:
         q = q.filter(Project.name.ilike(f"%{query}%"))
     if status:
-        q = q.filter(Project.status == status)
+        q = q.filter(status_filter(Project, status))
+
+    return q.order_by(Project.deadline)
 
-    return q.order_by(Project.deadline).all()
+def list_projects(
+    db: SessionLocal,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    query: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    q = filtered_projects_query(db, from_date, to_date, query, status)
+    return _list_page(q, Project, fields, limit, cursor, [Project.deadline, Project.id])
 
 def get_project_stages(db: SessionLocal, project_id: int):
     return db.query(ProjectStage).filter(ProjectStage.project_id == project_id).order_by(ProjectStage.id).all()
 
 
 def get_stage_tasks(db: SessionLocal, project_id: int, stage_id: int):
+    return stage_tasks_query(db, project_id, stage_id).all()
+
+def stage_tasks_query(db: SessionLocal, project_id: int, stage_id: int):
     return (
         db.query(Task)
         .filter(Task.project_id == project_id, Task.stage_id == stage_id)
         .order_by(Task.deadline)
-        .all()
     )
 
+def get_project_full(session, project_id: int, from_date: Optional[date] = None, to_date: Optional[date] = None) -> dict | None:
+    projects = get_projects_full(session, [project_id], from_date, to_date)
+    return projects[0] if projects else None
+
+def get_projects_full(session, project_ids: Optional[List[int]], from_date: Optional[date] = None, to_date: Optional[date] = None) -> list[dict]:
+    """Проекты вместе с этапами, задачами, исполнителями и баллами.
+
+    Число запросов не зависит от размера: проекты, этапы, задачи и исполнители
+    (с сотрудниками) подгружаются selectinload-ом, баллы проектов — одним запросом
+    к леджеру. project_ids=None — все проекты; период по умолчанию — всё время.
+    """
+    from_date = from_date or date.min
+    to_date = to_date or date.max
+    q = session.query(Project).options(
+        selectinload(Project.stages)
+        .selectinload(ProjectStage.tasks)
+        .selectinload(Task.executor_links)
+        .joinedload(TaskExecutor.employee)
+    )
+    if project_ids is not None:
+        q = q.filter(Project.id.in_(project_ids))
+    projects = q.order_by(Project.deadline, Project.id).all()
+    if not projects:
+        return []
+
+    scores = get_project_scores(session, [p.id for p in projects], from_date, to_date)
+    return [
+        {
+            "id": project.id,
+            "name": project.name,
+            "description": project.description,
+            "created_date": project.created_date,
+            "deadline": project.deadline,
+            "completed_date": project.completed_date,
+            "status": project.status,
+            "score": scores.get(project.id, 0),
+            "stages": [
+                _stage_full(stage, from_date, to_date)
+                for stage in sorted(project.stages, key=lambda s: s.id)
+            ],
+        }
+        for project in projects
+    ]
+
+def _stage_full(stage: ProjectStage, from_date: date, to_date: date) -> dict:
+    tasks = sorted(stage.tasks, key=lambda t: (t.deadline, t.id))
+    # балл этапа считается так же, как вклад задач в леджер проекта
+    score = sum(
+        calculate_task_score(t) * max(len(t.executor_links), 1)
+        for t in tasks
+        if t.completed_date and from_date <= t.completed_date <= to_date
+    )
+    return {
+        "id": stage.id,
+        "project_id": stage.project_id,
+        "name": stage.name,
+        "score": score,
+        "tasks": [
+            {
+                **task_to_dict(t),
+                "executors": [
+                    {"id": link.employee_id, "name": link.employee.name if link.employee else None}
+                    for link in t.executor_links
+                ],
+            }
+            for t in tasks
+        ],
+    }
+
 def filter_projects(db: SessionLocal, query: Optional[str] = None, status: Optional[str] = None):
     q = db.query(Project)
     if query:
         q = q.filter(Project.name.ilike(f"%{query}%"))
     if status:
-        q = q.filter(Project.status == status)
+        q = q.filter(status_filter(Project, status))
     return q.all()
 
 # Task functions
@@ -207,7 +338,7 @@ def add_task(session,
         deadline=deadline,
         difficulty=difficulty,
         status="в работе",
-        executor_ids=",".join(map(str, executor_ids)),
+        executor_ids=executor_ids,
         project_id=project_id,
         stage_id=stage_id
     )
@@ -215,15 +346,132 @@ def add_task(session,
     session.commit()
     return task
 
+def add_tasks(session, items: list[dict]) -> list[int]:
+    """Пакетное добавление задач: INSERT задач и их исполнителей (executemany), один commit.
+
+    items — словари с полями как у add_task. Новые задачи "в работе", леджер не меняется.
+    Возвращает id в порядке items.
+    """
+    if not items:
+        return []
+    created_date = date.today()
+    rows = [
+        {
+            "name": item["name"],
+            "description": item["description"],
+            "created_date": created_date,
+            "deadline": item["deadline"],
+            "difficulty": item["difficulty"],
+            "status": "в работе",
+            "project_id": item.get("project_id"),
+            "stage_id": item.get("stage_id"),
+        }
+        for item in items
+    ]
+    ids = insert_many(session, Task, rows)
+    links = [
+        {"task_id": task_id, "employee_id": employee_id}
+        for task_id, item in zip(ids, items)
+        for employee_id in dict.fromkeys(item["executor_ids"])
+    ]
+    if links:
+        session.execute(insert(TaskExecutor), links)
+    session.commit()
+    return ids
+
+def update_tasks(session, changes: dict[int, dict]) -> list[int]:
+    """Пакетное изменение задач в одной транзакции, леджер обновляется одной дельтой.
+
+    changes — {id задачи: {поле: значение}}. При переводе в "выполнено" без
+    completed_date ставится сегодняшняя дата; у уже выполненной задачи дата
+    не меняется, так что повторная отправка того же статуса ничего не сдвигает.
+    Возвращает id, которых нет в БД (их изменения не применяются).
+    """
+    if not changes:
+        return []
+    tasks = {t.id: t for t in session.query(Task).filter(Task.id.in_(changes)).all()}
+    before, after = Counter(), Counter()
+    for task_id, fields in changes.items():
+        task = tasks.get(task_id)
+        if task is None:
+            continue
+        before.update(snapshot_task_score(task))
+        was_done = task.status == "выполнено" and task.completed_date is not None
+        for field, value in fields.items():
+            setattr(task, field, value)
+        if fields.get("status") == "выполнено" and "completed_date" not in fields and not was_done:
+            task.completed_date = date.today()
+        after.update(snapshot_task_score(task))
+    apply_score_delta(session, before, after)
+    session.commit()
+    return [task_id for task_id in changes if task_id not in tasks]
+
+def insert_many(session, model, rows: list[dict]) -> list[int]:
+    """INSERT ... RETURNING id пачками (insertmanyvalues). Возвращает id в порядке rows.
+
+    sort_by_parameter_order на SQLite откатывается к INSERT на каждую строку,
+    поэтому порядок восстанавливается сортировкой: автоинкрементный id внутри
+    транзакции выдаётся строкам по возрастанию в порядке VALUES.
+    """
+    table = model.__table__
+    # Core-вставка по таблице: ORM-вариант ради вычисляемых колонок (effective_end)
+    # разбивает пачку на отдельные INSERT
+    return sorted(session.scalars(insert(table).returning(table.c.id), rows).all())
+
+def existing_task_ids(session, task_ids) -> set[int]:
+    if not task_ids:
+        return set()
+    return set(session.scalars(select(Task.id).where(Task.id.in_(task_ids))))
+
+def check_task_references(session, items: list[dict]) -> dict[int, list[str]]:
+    """Проверяет ссылки задач (исполнители, проект, этап) несколькими запросами на весь пакет.
+
+    Возвращает {индекс элемента: список ошибок} только для элементов с ошибками.
+    """
+    employee_ids = {e for item in items for e in item.get("executor_ids") or ()}
+    project_ids = {item["project_id"] for item in items if item.get("project_id") is not None}
+    stage_ids = {item["stage_id"] for item in items if item.get("stage_id") is not None}
+
+    known_employees = set(session.scalars(select(Employee.id).where(Employee.id.in_(employee_ids)))) if employee_ids else set()
+    known_projects = set(session.scalars(select(Project.id).where(Project.id.in_(project_ids)))) if project_ids else set()
+    stage_projects = dict(session.execute(
+        select(ProjectStage.id, ProjectStage.project_id).where(ProjectStage.id.in_(stage_ids))
+    ).all()) if stage_ids else {}
+
+    errors = {}
+    for index, item in enumerate(items):
+        problems = []
+        missing = [e for e in item.get("executor_ids") or () if e not in known_employees]
+        if missing:
+            problems.append(f"unknown executor_ids: {missing}")
+        project_id, stage_id = item.get("project_id"), item.get("stage_id")
+        if project_id is not None and project_id not in known_projects:
+            problems.append(f"project {project_id} not found")
+        if stage_id is not None:
+            if stage_id not in stage_projects:
+                problems.append(f"stage {stage_id} not found")
+            elif stage_projects[stage_id] != project_id:
+                problems.append(f"stage {stage_id} does not belong to project {project_id}")
+        if problems:
+            errors[index] = problems
+    return errors
+
 def update_task_status(session, task_id: int, status: str = "выполнено") -> None:
     task = session.query(Task).get(task_id)
     if not task:
         return
+    before = snapshot_task_score(task)
     task.status = status
     if status == "выполнено":
         task.completed_date = datetime.today().date()
+    apply_score_delta(session, before, snapshot_task_score(task))
     session.commit()
 
+def delete_task(session, task: Task) -> None:
+    """Удаляет задачу вместе с её вкладом в леджер баллов (без commit)."""
+    apply_score_delta(session, snapshot_task_score(task), Counter())
+    session.delete(task)
+
 def calculate_task_score(task: Task) -> int:
     if not task.completed_date:
         return 0
@@ -246,81 +494,520 @@ def filter_tasks_in_period(
     query: Optional[str] = None,
     status: Optional[str] = None
 ):
-    today = date.today()
+    return tasks_in_period_query(db, from_date, to_date, query, status).all()
+
+def tasks_in_period_query(
+    db: SessionLocal,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    query: Optional[str] = None,
+    status: Optional[str] = None,
+    unlinked_only: bool = False,
+):
     q = db.query(Task)
 
+    if unlinked_only:
+        q = q.filter(Task.project_id.is_(None))
     if from_date and to_date:
-        q = q.filter(Task.created_date <= to_date)
-
-        effective_end = func.coalesce(
-            case(
-                (Task.status == "в работе", Task.deadline),
-                (Task.status == "просрочено", today),
-                else_=case(
-                    (Task.deadline >= Task.completed_date, Task.deadline),
-                    (Task.deadline < Task.completed_date, Task.completed_date),
-                )
-            ),
-            today
-        )
-
-        q = q.filter(effective_end >= from_date)
-
+        q = q.filter(in_period(Task, from_date, to_date))
     if query:
         q = q.filter(Task.name.ilike(f"%{query}%"))
     if status:
-        q = q.filter(Task.status == status)
+        q = q.filter(status_filter(Task, status))
 
-    return q.all()
+    return q
 
-def parse_executor_ids(task: Task) -> list[int]:
-    if not task.executor_ids:
-        return []
-    return [int(eid) for eid in task.executor_ids.split(",") if eid.strip().isdigit()]
+def list_tasks(
+    db: SessionLocal,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    query: Optional[str] = None,
+    status: Optional[str] = None,
+    unlinked_only: bool = False,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    q = tasks_in_period_query(db, from_date, to_date, query, status, unlinked_only=unlinked_only)
+    if fields is not None and "executor_ids" not in fields:
+        q = q.options(noload(Task.executor_links))
+    return _list_page(q, Task, fields, limit, cursor, [Task.deadline, Task.id], serialize=task_to_dict)
+
+def _list_page(q, model, fields, limit, cursor, sort_columns, serialize=None):
+    """Общая часть списочных эндпоинтов: выбор полей и keyset-пагинация.
+
+    Без limit — весь список (как раньше), с limit — {"items": [...], "next_cursor": ...}.
+    """
+    extra_columns = list(sort_columns)
+    if _status_on_read and fields is not None and "status" in fields and model in (Task, Project):
+        # статус вычисляется из deadline и completed_date — они нужны при загрузке
+        extra_columns += [model.deadline, model.completed_date]
+    q = only_fields(q, model, fields, extra_columns)
+    if limit is None:
+        rows, next_cursor = q.all(), None
+    else:
+        rows, next_cursor = keyset_page(q, sort_columns, limit, cursor)
+
+    if fields is not None:
+        items = [to_fields(row, fields) for row in rows]
+    elif serialize is not None:
+        items = [serialize(row) for row in rows]
+    else:
+        items = rows
+    if limit is None:
+        return items
+    return {"items": items, "next_cursor": next_cursor}
+
+class likely(FunctionElement):
+    """Условие, верное почти для всех строк: подсказка планировщику SQLite не
+    выбирать по нему индекс. На других СУБД — само условие."""
+    name = "likely"
+    inherit_cache = True
+
+
+@compiles(likely)
+def _compile_likely(element, compiler, **kw):
+    return f"({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(likely, "sqlite")
+def _compile_likely_sqlite(element, compiler, **kw):
+    return f"likely({compiler.process(element.clauses, **kw)})"
+
+
+def in_period(model, from_date: date, to_date: date):
+    """Условие «задача/проект пересекается с периодом» для Task или Project.
+
+    Конечная дата берётся из индексируемой колонки effective_end; NULL в ней
+    означает «по сегодняшний день», поэтому такие строки попадают в период,
+    только если он начинается не позже сегодняшнего дня.
+
+    Если период доходит до сегодняшнего дня, условие на created_date почти
+    ничего не отсекает — поиск идёт по индексу effective_end, иначе (прошлые
+    периоды) по created_date.
+    """
+    today = date.today()
+    if from_date <= today:
+        ends_in_period = or_(model.effective_end >= from_date, model.effective_end.is_(None))
+        if _status_on_read:
+            # ещё не помеченные просроченными тоже открыты по сегодняшний день
+            ends_in_period = or_(ends_in_period, overdue_condition(model, today))
+    else:
+        ends_in_period = model.effective_end >= from_date
+    created_before_end = model.created_date <= to_date
+    if to_date >= today:
+        created_before_end = likely(created_before_end)
+    return and_(created_before_end, ends_in_period)
+
+EMPLOYEE_FIELDS = ("id", "name", "position", "start_date", "status", "status_start", "status_end")
+PROJECT_FIELDS = ("id", "name", "description", "created_date", "deadline", "completed_date", "status")
+TASK_FIELDS = (
+    "id", "name", "description", "created_date", "deadline", "completed_date",
+    "difficulty", "status", "executor_ids", "project_id", "stage_id",
+)
+
+def task_to_dict(task: Task) -> dict:
+    """Сериализует задачу для API: executor_ids отдаётся списком id."""
+    return {
+        "id": task.id,
+        "name": task.name,
+        "description": task.description,
+        "created_date": task.created_date,
+        "deadline": task.deadline,
+        "completed_date": task.completed_date,
+        "difficulty": task.difficulty,
+        "status": task.status,
+        "executor_ids": task.executor_ids,
+        "project_id": task.project_id,
+        "stage_id": task.stage_id,
+    }
 
 # Statistics functions
 def get_department_score(session, from_date: date, to_date: date) -> int:
-    employees = session.query(Employee).all()
-    return sum(get_employee_score(session, emp.id, from_date, to_date) for emp in employees)
+    total = session.query(func.sum(EmployeeScore.score)).join(
+        Employee, Employee.id == EmployeeScore.employee_id
+    ).filter(
+        EmployeeScore.day >= from_date,
+        EmployeeScore.day <= to_date,
+    ).scalar()
+    return total or 0
+
+# Score series functions
+SERIES_GRANULARITIES = ("week", "month", "quarter")
+
+def get_employee_score_series(session, employee_id: int, from_date: date, to_date: date, granularity: str = "month") -> list[dict]:
+    return _score_series(session, EmployeeScore, [EmployeeScore.employee_id == employee_id], from_date, to_date, granularity)
+
+def get_project_score_series(session, project_id: int, from_date: date, to_date: date, granularity: str = "month") -> list[dict]:
+    return _score_series(session, ProjectScore, [ProjectScore.project_id == project_id], from_date, to_date, granularity)
+
+def get_department_score_series(session, from_date: date, to_date: date, granularity: str = "month") -> list[dict]:
+    # как и get_department_score — только баллы существующих сотрудников
+    existing = EmployeeScore.employee_id.in_(session.query(Employee.id).scalar_subquery())
+    return _score_series(session, EmployeeScore, [existing], from_date, to_date, granularity)
+
+def _score_series(session, model, filters, from_date: date, to_date: date, granularity: str) -> list[dict]:
+    """Баллы по интервалам одним сгруппированным запросом к леджеру.
+
+    Интервалы без баллов возвращаются с нулём, крайние обрезаются по периоду,
+    так что сумма ряда равна баллам за весь период.
+    """
+    if granularity not in SERIES_GRANULARITIES:
+        raise ValueError(f"unknown granularity: {granularity}")
+
+    bucket = _sql_bucket_start(model.day, granularity, session.get_bind().dialect.name).label("bucket")
+    rows = session.query(bucket, func.sum(model.score)).filter(
+        *filters,
+        model.day >= from_date,
+        model.day <= to_date,
+    ).group_by(bucket).all()
+    totals = {
+        (date.fromisoformat(start) if isinstance(start, str) else start): total
+        for start, total in rows
+    }
+
+    series = []
+    start = bucket_start(from_date, granularity)
+    while start <= to_date:
+        following = _next_bucket(start, granularity)
+        series.append({
+            "start": max(start, from_date),
+            "end": min(following - timedelta(days=1), to_date),
+            "score": totals.get(start, 0),
+        })
+        start = following
+    return series
+
+def score_export_query(session, entity: str, from_date: date, to_date: date, granularity: str = "day"):
+    """Запрос (id, name, period_start, score) по леджеру сотрудников ("employees") или проектов ("projects").
+
+    Строки сгруппированы по дням или интервалам SERIES_GRANULARITIES и
+    упорядочены по id и началу интервала; пустые интервалы не выдаются.
+    """
+    if entity == "employees":
+        owner, model, key = Employee, EmployeeScore, EmployeeScore.employee_id
+    elif entity == "projects":
+        owner, model, key = Project, ProjectScore, ProjectScore.project_id
+    else:
+        raise ValueError(f"unknown entity: {entity}")
+
+    if granularity == "day":
+        bucket = model.day
+    elif granularity in SERIES_GRANULARITIES:
+        bucket = _sql_bucket_start(model.day, granularity, session.get_bind().dialect.name)
+    else:
+        raise ValueError(f"unknown granularity: {granularity}")
+    bucket = bucket.label("period_start")
+
+    return session.query(
+        owner.id, owner.name, bucket, func.sum(model.score).label("score"),
+    ).join(
+        model, key == owner.id,
+    ).filter(
+        model.day >= from_date,
+        model.day <= to_date,
+    ).group_by(owner.id, owner.name, bucket).order_by(owner.id, bucket)
+
+def series_bucket_count(from_date: date, to_date: date, granularity: str) -> int:
+    """Число интервалов в ряду _score_series за период — без построения самого ряда."""
+    first, last = bucket_start(from_date, granularity), bucket_start(to_date, granularity)
+    if granularity == "week":
+        count = (last - first).days // 7 + 1
+    else:
+        months = 1 if granularity == "month" else 3
+        count = ((last.year - first.year) * 12 + last.month - first.month) // months + 1
+    return max(count, 0)
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Начало интервала (неделя с понедельника, месяц, квартал), в который попадает день."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+
+def _next_bucket(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    months = 1 if granularity == "month" else 3
+    month_index = start.month - 1 + months
+    return start.replace(year=start.year + month_index // 12, month=month_index % 12 + 1)
+
+def _sql_bucket_start(column, granularity: str, dialect: str):
+    """SQL-выражение начала интервала для даты — то же, что bucket_start()."""
+    if dialect != "sqlite":
+        return cast(func.date_trunc(granularity, column), Date)
+
+    if granularity == "week":
+        # strftime('%w'): 0 — воскресенье; сдвигаем к понедельнику
+        weekday = (cast(func.strftime("%w", column), Integer) + 6) % 7
+        return func.date(column, func.printf("-%d days", weekday))
+    if granularity == "month":
+        return func.date(column, "start of month")
+    quarter_month = (cast(func.strftime("%m", column), Integer) - 1) // 3 * 3 + 1
+    return func.printf("%s-%02d-01", func.strftime("%Y", column), quarter_month)
+
+# Score ledger functions
+def snapshot_task_score(task: Task) -> Counter:
+    """Вклад задачи в леджер: {(модель леджера, id сотрудника/проекта, день): баллы}.
+
+    Повторяет семантику расчёта: каждый исполнитель получает calculate_task_score,
+    проект — балл, умноженный на число исполнителей (минимум 1).
+    """
+    contribution = Counter()
+    if not task.completed_date:
+        return contribution
+
+    base = calculate_task_score(task)
+    executors = set(task.executor_ids)
+    for employee_id in executors:
+        contribution[(EmployeeScore, employee_id, task.completed_date)] += base
+    if task.project_id is not None:
+        contribution[(ProjectScore, task.project_id, task.completed_date)] += base * max(len(executors), 1)
+    return contribution
+
+def apply_score_delta(session, before: Counter, after: Counter) -> None:
+    """Переносит в леджер разницу между двумя снимками вклада задач (без commit)."""
+    delta = Counter(after)
+    delta.subtract(before)
+    _load_ledger_rows(session, [k for k, diff in delta.items() if diff])
+
+    for (model, key, day), diff in delta.items():
+        if diff == 0:
+            continue
+        row = session.get(model, (key, day))
+        if row is None:
+            session.add(model(**{_ledger_key(model): key, "day": day, "score": diff}))
+        elif row.score + diff == 0:
+            session.delete(row)
+        else:
+            row.score += diff
+    # новые строки должны попасть в identity map до следующего вызова
+    session.flush()
+
+def _load_ledger_rows(session, keys, batch_size: int = 400) -> None:
+    """Подгружает строки леджера пачками, чтобы session.get() брал их из identity map."""
+    by_model = {}
+    for model, key, day in keys:
+        by_model.setdefault(model, []).append((key, day))
+    for model, pairs in by_model.items():
+        if len(pairs) < 2:
+            continue
+        key_column = getattr(model, _ledger_key(model))
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            session.query(model).filter(tuple_(key_column, model.day).in_(batch)).all()
+
+def _ledger_key(model) -> str:
+    return "employee_id" if model is EmployeeScore else "project_id"
+
+def compute_score_ledger(session) -> Counter:
+    """Полный пересчёт леджера по всем выполненным задачам.
+
+    Считается векторно по колонкам (TaskBase.scoring), без загрузки объектов Task;
+    результат тот же, что у snapshot_task_score по каждой задаче.
+    """
+    columns = load_task_columns(session)
+    return ledger_contribution(columns, score_tasks(columns))
+
+def rebuild_score_ledger(session) -> int:
+    """Перестраивает леджер с нуля. Возвращает число записанных строк."""
+    expected = compute_score_ledger(session)
+    session.query(EmployeeScore).delete(synchronize_session=False)
+    session.query(ProjectScore).delete(synchronize_session=False)
+
+    rows = {EmployeeScore: [], ProjectScore: []}
+    for (model, key, day), score in expected.items():
+        if score != 0:
+            rows[model].append({_ledger_key(model): key, "day": day, "score": score})
+    for model, values in rows.items():
+        if values:
+            session.execute(insert(model), values)
+    session.commit()
+    return sum(len(values) for values in rows.values())
+
+def check_score_ledger(session) -> list[dict]:
+    """Сравнивает леджер с полным пересчётом. Возвращает список расхождений."""
+    expected = compute_score_ledger(session)
+    actual = Counter()
+    for model in (EmployeeScore, ProjectScore):
+        key_column = getattr(model, _ledger_key(model))
+        for key, day, score in session.query(key_column, model.day, model.score):
+            actual[(model, key, day)] += score
+
+    mismatches = []
+    for model, key, day in sorted(set(expected) | set(actual), key=lambda k: (k[0].__tablename__, k[1], k[2])):
+        if expected[(model, key, day)] != actual[(model, key, day)]:
+            mismatches.append({
+                "ledger": model.__tablename__,
+                "id": key,
+                "day": day,
+                "expected": expected[(model, key, day)],
+                "actual": actual[(model, key, day)],
+            })
+    return mismatches
 
 # Auxiliary functions
 def get_session():
     return SessionLocal()
 
-def check_and_update_overdue_status() -> None:
-    """Обновляет статусы задач/проектов, у которых дедлайн прошёл."""
-    today = datetime.now().date()
+def get_read_session():
+    """Сессия только для чтения (отдельный движок, если он включён в настройках)."""
+    return ReadSessionLocal()
+
+OVERDUE_BATCH_SIZE = 500
+
+def overdue_condition(model, today: date):
+    """Задача/проект в работе, не завершены, а дедлайн уже прошёл (без дедлайна — не просрочиваются).
+
+    Условие покрывается индексом (status, deadline).
+    """
+    return and_(
+        model.status == "в работе",
+        model.deadline < today,
+        model.completed_date.is_(None),
+    )
+
+def overdue_tasks_query(session, today: date):
+    """Задачи, которые пора пометить просроченными."""
+    return session.query(Task.id).filter(overdue_condition(Task, today))
+
+def overdue_projects_query(session, today: date):
+    """Проекты, которые пора пометить просроченными."""
+    return session.query(Project.id).filter(overdue_condition(Project, today))
+
+# Статус «просрочено» при чтении: в этом режиме его не нужно записывать
+# плановым пересчётом. В БД у таких строк остаётся «в работе», а фильтры по
+# статусу и периоду и загруженные объекты учитывают дедлайн на сегодня.
+_status_on_read = False
+
+def configure_status_mode(on_read: bool) -> None:
+    """Включает (или выключает) вычисление статуса «просрочено» при чтении."""
+    global _status_on_read
+    _status_on_read = on_read
+    for model in (Task, Project):
+        for name in ("load", "refresh"):
+            if event.contains(model, name, _apply_effective_status):
+                event.remove(model, name, _apply_effective_status)
+            if on_read:
+                event.listen(model, name, _apply_effective_status)
+
+def status_on_read() -> bool:
+    return _status_on_read
+
+def effective_status(obj) -> str:
+    """Статус задачи/проекта с учётом дедлайна на сегодня."""
+    if obj.status == "в работе" and obj.completed_date is None and obj.deadline is not None and obj.deadline < date.today():
+        return "просрочено"
+    return obj.status
+
+def status_filter(model, status: str):
+    """Фильтр по статусу; в режиме статуса при чтении — по вычисленному статусу."""
+    if not _status_on_read or status not in ("в работе", "просрочено"):
+        return model.status == status
+    today = date.today()
+    if status == "просрочено":
+        return or_(model.status == "просрочено", overdue_condition(model, today))
+    return and_(
+        model.status == "в работе",
+        or_(model.deadline >= today, model.deadline.is_(None), model.completed_date.is_not(None)),
+    )
+
+def _apply_effective_status(target, *args) -> None:
+    loaded = target.__dict__
+    # при load_only без дедлайна статус не пересчитываем — иначе была бы догрузка
+    if not all(key in loaded for key in ("status", "deadline", "completed_date")):
+        return
+    status = effective_status(target)
+    if status != loaded["status"]:
+        # как будто так и загружено из БД: объект не становится «изменённым»
+        set_committed_value(target, "status", status)
+
+@dataclass
+class OverdueRun:
+    """Итог одного прохода check_and_update_overdue_status."""
+    started_at: datetime
+    task_ids: list = field(default_factory=list)
+    project_ids: list = field(default_factory=list)
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def updated(self) -> int:
+        return len(self.task_ids) + len(self.project_ids)
+
+class OverdueStats:
+    """Счётчики прогонов пересчёта просроченных задач (для /stats/overdue)."""
+
+    def __init__(self):
+        self.runs = 0
+        self.tasks_updated = 0
+        self.projects_updated = 0
+        self.seconds_total = 0.0
+        self.last: Optional[OverdueRun] = None
+
+    def record(self, run: OverdueRun) -> None:
+        self.runs += 1
+        self.tasks_updated += len(run.task_ids)
+        self.projects_updated += len(run.project_ids)
+        self.seconds_total += run.seconds
+        self.last = run
+
+    def snapshot(self) -> dict:
+        last = self.last
+        return {
+            "runs": self.runs,
+            "tasks_updated": self.tasks_updated,
+            "projects_updated": self.projects_updated,
+            "seconds_total": round(self.seconds_total, 6),
+            "last_run": None if last is None else {
+                "started_at": last.started_at.isoformat(timespec="seconds"),
+                "seconds": round(last.seconds, 6),
+                "batches": last.batches,
+                "tasks_updated": len(last.task_ids),
+                "projects_updated": len(last.project_ids),
+            },
+        }
+
+overdue_stats = OverdueStats()
+
+def check_and_update_overdue_status(today: Optional[date] = None, batch_size: int = OVERDUE_BATCH_SIZE) -> OverdueRun:
+    """Помечает просроченными задачи и проекты, у которых прошёл дедлайн.
+
+    Строки выбираются по индексу (status, deadline) и обновляются пачками по
+    batch_size, каждая пачка — отдельная короткая транзакция, так что запись
+    не блокируется на весь проход. Если просроченных нет, проход сводится к
+    двум поискам по индексу. Возвращает id изменённых задач и проектов; на
+    леджер баллов смена статуса не влияет (баллы считаются по completed_date).
+    """
+    today = today or datetime.now().date()
+    run = OverdueRun(started_at=datetime.now())
+    started = time.perf_counter()
 
     with SessionLocal() as session:
-        # Просроченные задачи: только те, что ещё в работе и не завершены
-        session.execute(
-            update(Task)
-            .where(
-                and_(
-                    Task.status == "в работе",
-                    Task.completed_date.is_(None),
-                    Task.deadline < today,
-                )
-            )
+        run.task_ids = _mark_overdue(session, Task, overdue_tasks_query(session, today), batch_size, run)
+        run.project_ids = _mark_overdue(session, Project, overdue_projects_query(session, today), batch_size, run)
+
+    run.seconds = time.perf_counter() - started
+    overdue_stats.record(run)
+    return run
+
+def _mark_overdue(session, model, query, batch_size: int, run: OverdueRun) -> list[int]:
+    changed = []
+    while True:
+        ids = [row_id for (row_id,) in query.order_by(model.deadline, model.id).limit(batch_size)]
+        if not ids:
+            return changed
+        # условия повторяются в UPDATE: строку могли изменить между выборкой и записью
+        updated = session.execute(
+            update(model)
+            .where(model.id.in_(ids), query.whereclause)
             .values(status="просрочено")
-        )
-
-        # Просроченные проекты: в работе, с непустым дедлайном и он прошёл,
-        # и проект не завершён
-        session.execute(
-            update(Project)
-            .where(
-                and_(
-                    Project.status == "в работе",
-                    Project.completed_date.is_(None),
-                    Project.deadline.is_not(None),
-                    Project.deadline < today,
-                )
-            )
-            .values(status="просрочено")
-        )
-
+            .returning(model.id)
+        ).scalars().all()
         session.commit()
+        changed.extend(updated)
+        run.batches += 1
 
 # def create_default_project_if_not_exists(session) -> int:
 #     """Создает проект 'Прочие задачи', если он ещё не создан"""
@@ -0,0 +1,95 @@
+"""Миграции схемы, которые не покрывает Base.metadata.create_all.
+
+Каждая миграция идемпотентна и вызывается из init_db() при каждом запуске.
+"""
+from sqlalchemy import inspect, insert, text
+from sqlalchemy.orm import Session
+
+from TaskBase.logic import rebuild_score_ledger
+from TaskBase.models import Base, EFFECTIVE_END_SQL, EmployeeScore, ProjectScore, Task, TaskExecutor
+from TaskBase.search import create_search_index
+
+
+def run_migrations(engine) -> None:
+    migrate_executor_ids(engine)
+    migrate_score_ledger(engine)
+    migrate_effective_end(engine)
+    create_missing_indexes(engine)
+    create_search_index(engine)
+
+
+EXECUTOR_IDS_BACKUP = "tasks_executor_ids_backup"
+
+
+def migrate_executor_ids(engine) -> None:
+    """Переносит CSV-колонку tasks.executor_ids в таблицу task_executors.
+
+    Всё в одной транзакции: исходные строки копируются в таблицу
+    tasks_executor_ids_backup, затем проверяется, что каждый разобранный id
+    есть в task_executors, и только после этого колонка удаляется. Если
+    проверка не прошла, транзакция откатывается и колонка остаётся как была.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("tasks")}
+    if "executor_ids" not in columns:
+        return
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite сам открывает транзакцию только перед DML — DDL ниже выполнился бы вне её
+            conn.exec_driver_sql("BEGIN")
+        conn.execute(text(f"DROP TABLE IF EXISTS {EXECUTOR_IDS_BACKUP}"))
+        conn.execute(text(f"CREATE TABLE {EXECUTOR_IDS_BACKUP} AS SELECT id AS task_id, executor_ids FROM tasks"))
+
+        links = set()
+        for task_id, executor_ids in conn.execute(text("SELECT id, executor_ids FROM tasks")):
+            for eid in (executor_ids or "").split(","):
+                if eid.strip().isdigit():
+                    links.add((task_id, int(eid)))
+
+        existing = set(conn.execute(text("SELECT task_id, employee_id FROM task_executors")).tuples())
+        missing = links - existing
+        if missing:
+            conn.execute(
+                insert(TaskExecutor.__table__),
+                [{"task_id": task_id, "employee_id": eid} for task_id, eid in sorted(missing)],
+            )
+
+        stored = set(conn.execute(text("SELECT task_id, employee_id FROM task_executors")).tuples())
+        lost = links - stored
+        if lost:
+            raise RuntimeError(f"executor_ids migration: {len(lost)} links missing from task_executors, nothing dropped")
+        conn.execute(text("ALTER TABLE tasks DROP COLUMN executor_ids"))
+
+
+def migrate_score_ledger(engine) -> None:
+    """Заполняет леджер баллов, если он пуст, а выполненные задачи уже есть."""
+    with Session(bind=engine) as session:
+        if session.query(EmployeeScore).first() or session.query(ProjectScore).first():
+            return
+        if not session.query(Task.id).filter(Task.completed_date.isnot(None)).first():
+            return
+        rebuild_score_ledger(session)
+
+
+def migrate_effective_end(engine) -> None:
+    """Добавляет генерируемую колонку effective_end в tasks и projects."""
+    # SQLite умеет добавлять через ALTER только VIRTUAL-колонки; индекс по ней
+    # при этом работает так же. Новые БД создаются с STORED-колонкой.
+    kind = "VIRTUAL" if engine.dialect.name == "sqlite" else "STORED"
+    inspector = inspect(engine)
+    for table in ("tasks", "projects"):
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if "effective_end" in columns:
+            continue
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN effective_end DATE "
+                f"GENERATED ALWAYS AS ({EFFECTIVE_END_SQL}) {kind}"
+            ))
+
+
+def create_missing_indexes(engine) -> None:
+    """create_all не добавляет индексы в уже существующие таблицы — создаём их здесь."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -1,16 +1,96 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, create_engine
-from sqlalchemy.orm import relationship, sessionmaker, declarative_base
+from sqlalchemy import Column, Computed, Integer, String, Date, ForeignKey, Index, create_engine, event
+from sqlalchemy.orm import deferred, relationship, sessionmaker, declarative_base
 import os
 import datetime
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+
+def create_db_engine(url: str, sqlite_pragmas: dict | None = None, read_only: bool = False, **pool_options):
+    """Создаёт движок; для SQLite на каждом соединении выполняются PRAGMA из sqlite_pragmas.
+
+    read_only=True для SQLite включает PRAGMA query_only — соединения движка не могут писать.
+    pool_options (pool_size, max_overflow, ...) не применяются к БД в памяти.
+    """
+    is_sqlite = url.startswith("sqlite")
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    in_memory = is_sqlite and (":memory:" in url or url in ("sqlite://", "sqlite:///"))
+    new_engine = create_engine(url, connect_args=connect_args, **({} if in_memory else pool_options))
+
+    pragmas = dict(sqlite_pragmas or {}) if is_sqlite else {}
+    if is_sqlite and read_only:
+        pragmas["query_only"] = "ON"
+    attach_sqlite_pragmas(new_engine, pragmas)
+
+    return new_engine
+
+
+def attach_sqlite_pragmas(sync_engine, pragmas: dict) -> None:
+    """Выполняет PRAGMA на каждом новом соединении движка (для async — его sync_engine)."""
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+engine = create_db_engine(DATABASE_URL)
+read_engine = engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# сессии для чтения; по умолчанию на том же движке, что и SessionLocal
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
+def configure_database(
+    url: str = DATABASE_URL,
+    sqlite_pragmas: dict | None = None,
+    read_engine_enabled: bool = False,
+    read_url: str | None = None,
+    **pool_options,
+) -> None:
+    """Пересоздаёт движки с профилем подключения и перепривязывает к ним фабрики сессий.
+
+    Если включён read_engine_enabled (или задан read_url), ReadSessionLocal получает
+    отдельный движок: для SQLite — тот же файл с query_only, иначе — read_url (реплика).
+    """
+    global engine, read_engine
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
+
+    engine = create_db_engine(url, sqlite_pragmas, **pool_options)
+    if read_engine_enabled or read_url:
+        read_engine = create_db_engine(read_url or url, sqlite_pragmas, read_only=read_url is None, **pool_options)
+    else:
+        read_engine = engine
+
+    SessionLocal.configure(bind=engine)
+    ReadSessionLocal.configure(bind=read_engine)
+
+
+def get_engine():
+    """Текущий движок для записи (после configure_database он меняется)."""
+    return engine
+
+# Конечная дата задачи/проекта для фильтра по периоду, не зависящая от текущего дня.
+# NULL означает «открыт до сегодня» (просрочено или нет даты) — сегодняшняя дата
+# подставляется уже в запросе. Хранится как генерируемая колонка, чтобы её можно
+# было проиндексировать.
+EFFECTIVE_END_SQL = (
+    "CASE"
+    " WHEN status = 'в работе' THEN deadline"
+    " WHEN status = 'просрочено' THEN NULL"
+    " WHEN deadline >= completed_date THEN deadline"
+    " WHEN deadline < completed_date THEN completed_date"
+    " END"
+)
+
+
 class Employee(Base):
     __tablename__ = "employees"
     id = Column(Integer, primary_key=True)
@@ -31,16 +111,24 @@ class Project(Base):
     deadline = Column(Date, nullable=True)
     completed_date = Column(Date, nullable=True)
     status = Column(String, default="в работе")  # в работе / завершен / просрочено
+    effective_end = deferred(Column(Date, Computed(EFFECTIVE_END_SQL, persisted=True)))
 
     stages = relationship("ProjectStage", back_populates="project", cascade="all, delete-orphan")
     tasks = relationship("Task", back_populates="project")
 
+    __table_args__ = (
+        Index("ix_projects_status_deadline", "status", "deadline"),
+        Index("ix_projects_completed_date", "completed_date"),
+        Index("ix_projects_created_date", "created_date"),
+        Index("ix_projects_effective_end", "effective_end"),
+    )
+
 
 class ProjectStage(Base):
     __tablename__ = "project_stages"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
 
     project = relationship("Project", back_populates="stages")
     tasks = relationship("Task", back_populates="stage")
@@ -56,10 +144,77 @@ class Task(Base):
     completed_date = Column(Date, nullable=True)
     difficulty = Column(Integer, nullable=False)  # 1 - легко, 2 - средне, 4 - сложно
     status = Column(String, default="в работе")  # в работе / выполнено / просрочено
-    executor_ids = Column(String, nullable=False)  # CSV строка с id сотрудников
+    effective_end = deferred(Column(Date, Computed(EFFECTIVE_END_SQL, persisted=True)))
 
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     stage_id = Column(Integer, ForeignKey("project_stages.id"), nullable=True)
 
     project = relationship("Project", back_populates="tasks")
-    stage = relationship("ProjectStage", back_populates="tasks")
\ No newline at end of file
+    stage = relationship("ProjectStage", back_populates="tasks")
+    executor_links = relationship(
+        "TaskExecutor",
+        cascade="all, delete-orphan",
+        order_by="TaskExecutor.employee_id",
+        lazy="selectin",
+    )
+
+    __table_args__ = (
+        Index("ix_tasks_status_deadline", "status", "deadline"),
+        Index("ix_tasks_completed_date", "completed_date"),
+        Index("ix_tasks_created_date", "created_date"),
+        Index("ix_tasks_project_id_stage_id", "project_id", "stage_id"),
+        Index("ix_tasks_effective_end", "effective_end"),
+    )
+
+    @property
+    def executor_ids(self) -> list[int]:
+        return [link.employee_id for link in self.executor_links]
+
+    @executor_ids.setter
+    def executor_ids(self, ids) -> None:
+        # дубли убираем, уже существующие связи не пересоздаём
+        wanted = list(dict.fromkeys(int(i) for i in ids))
+        kept = [link for link in self.executor_links if link.employee_id in wanted]
+        existing = {link.employee_id for link in kept}
+        self.executor_links = kept + [
+            TaskExecutor(employee_id=eid) for eid in wanted if eid not in existing
+        ]
+
+
+class TaskExecutor(Base):
+    """Исполнитель задачи (связь многие-ко-многим tasks <-> employees)."""
+    __tablename__ = "task_executors"
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+
+    employee = relationship("Employee")
+
+    # первичный ключ (task_id, employee_id) покрывает поиск по задаче,
+    # этот индекс — поиск задач сотрудника
+    __table_args__ = (
+        Index("ix_task_executors_employee_id_task_id", "employee_id", "task_id"),
+    )
+
+
+class EmployeeScore(Base):
+    """Леджер баллов: сумма баллов сотрудника за задачи, выполненные в этот день."""
+    __tablename__ = "employee_score_ledger"
+    employee_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    score = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_employee_score_ledger_day", "day"),
+    )
+
+
+class ProjectScore(Base):
+    """Леджер баллов: сумма баллов проекта за задачи, выполненные в этот день."""
+    __tablename__ = "project_score_ledger"
+    project_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    score = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_project_score_ledger_day", "day"),
+    )
@@ -0,0 +1,80 @@
+"""Keyset-пагинация и выбор полей для списочных эндпоинтов.
+
+Курсор — непрозрачная строка (base64 от JSON со значениями ключа сортировки
+последней строки страницы). Следующая страница выбирается условием
+"ключ сортировки > курсора", поэтому стоимость запроса не зависит от номера
+страницы, а вставки между запросами не сдвигают выдачу.
+"""
+import base64
+import binascii
+import json
+from datetime import date
+
+from sqlalchemy import and_, nulls_first, or_
+from sqlalchemy.orm import load_only
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    """Разбирает курсор и приводит значения к типам колонок сортировки."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            None if v is None else
+            date.fromisoformat(v) if column.type.python_type is date else
+            column.type.python_type(v)
+            for column, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def _after(columns, values):
+    """Условие "(columns) > (values)" в порядке ORDER BY с NULLS FIRST."""
+    alternatives = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        prefix = [c.is_(None) if v is None else c == v for c, v in zip(columns[:i], values[:i])]
+        greater = column.is_not(None) if value is None else column > value
+        alternatives.append(and_(*prefix, greater))
+    return or_(*alternatives)
+
+
+def keyset_page(query, columns, limit: int, cursor: str | None = None):
+    """Страница query по ключу columns (последняя колонка — уникальный id).
+
+    Возвращает (строки, курсор следующей страницы или None).
+    """
+    query = query.order_by(None).order_by(
+        *(nulls_first(c) if c.nullable else c for c in columns)
+    )
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns)))
+    # лишняя строка показывает, есть ли следующая страница
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], c.key) for c in columns])
+
+
+def only_fields(query, model, fields: list[str] | None, extra_columns=()):
+    """Грузит из таблицы только колонки, нужные для fields (плюс extra_columns, id — всегда)."""
+    if fields is None:
+        return query
+    columns = [getattr(model, f) for f in fields if f in model.__table__.columns]
+    return query.options(load_only(*columns, *extra_columns))
+
+
+def to_fields(obj, fields: list[str]) -> dict:
+    return {f: getattr(obj, f) for f in fields}
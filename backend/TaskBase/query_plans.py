@@ -0,0 +1,107 @@
+"""Проверка планов запросов фильтров по периоду (только SQLite).
+
+    python -m TaskBase.query_plans
+
+Печатает EXPLAIN QUERY PLAN для фильтров filter_tasks_in_period,
+get_employee_tasks, get_filtered_projects, выборок пересчёта просроченных
+задач/проектов, выполненных в периоде задач и задач этапа и завершается с
+кодом 1, если какой-то из них сканирует tasks/projects целиком или не
+использует ожидаемый индекс. Те же проверки — в tests/test_query_plans.py.
+"""
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from TaskBase import init_db
+from TaskBase.logic import (
+    employee_tasks_query,
+    filtered_projects_query,
+    get_session,
+    overdue_projects_query,
+    overdue_tasks_query,
+    stage_tasks_query,
+    tasks_in_period_query,
+)
+from TaskBase.models import Task
+from TaskBase.scoring import completed_filters
+
+
+def explain(session, query) -> list[str]:
+    """Возвращает строки EXPLAIN QUERY PLAN для ORM-запроса или select()."""
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=session.get_bind().dialect)
+    params = tuple(
+        value.isoformat() if isinstance(value, date) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    connection = session.connection()
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def period_filter_queries(session) -> dict:
+    """{имя: (запрос, индекс, по которому он должен искать)}."""
+    today = date.today()
+    from_date, to_date = today - timedelta(days=30), today
+    # прошлый период: created_date отсекает больше, чем effective_end
+    past_from, past_to = today - timedelta(days=3 * 365), today - timedelta(days=2 * 365)
+    return {
+        "filter_tasks_in_period": (tasks_in_period_query(session, from_date, to_date), "ix_tasks_effective_end"),
+        "filter_tasks_in_period(past)": (tasks_in_period_query(session, past_from, past_to), "ix_tasks_created_date"),
+        "filter_tasks_in_period(status)": (tasks_in_period_query(session, status="просрочено"), "ix_tasks_status_deadline"),
+        "get_employee_tasks": (employee_tasks_query(session, 1, from_date, to_date),
+                               "ix_task_executors_employee_id_task_id"),
+        "get_filtered_projects": (filtered_projects_query(session, from_date, to_date), "ix_projects_effective_end"),
+        "get_filtered_projects(status)": (filtered_projects_query(session, status="в работе"),
+                                          "ix_projects_status_deadline"),
+        "overdue_tasks": (overdue_tasks_query(session, today), "ix_tasks_status_deadline"),
+        "overdue_projects": (overdue_projects_query(session, today), "ix_projects_status_deadline"),
+        "completed_tasks": (select(Task.id).where(*completed_filters(from_date, to_date)), "ix_tasks_completed_date"),
+        "get_stage_tasks": (stage_tasks_query(session, 1, 1), "ix_tasks_project_id_stage_id"),
+    }
+
+
+def uses_index(plan: list[str], index: str) -> bool:
+    return any(f"INDEX {index} " in f"{step} " for step in plan)
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Шаги плана, читающие tasks/projects полным проходом по таблице."""
+    return [
+        step for step in plan
+        if step.startswith("SCAN") and step.split()[1] in ("tasks", "projects") and "INDEX" not in step
+    ]
+
+
+def check_query_plans(session) -> dict[str, list[str]]:
+    """Возвращает {имя фильтра: описание проблем}; пустой словарь — всё ок."""
+    problems = {}
+    for name, (query, index) in period_filter_queries(session).items():
+        plan = explain(session, query)
+        found = full_scans(plan)
+        if not uses_index(plan, index):
+            found.append(f"не используется {index}")
+        if found:
+            problems[name] = found
+    return problems
+
+
+def main() -> int:
+    init_db()
+    with get_session() as session:
+        if session.get_bind().dialect.name != "sqlite":
+            print("Проверка планов поддерживается только для SQLite")
+            return 0
+        for name, (query, index) in period_filter_queries(session).items():
+            print(f"{name} (ожидается {index})")
+            for step in explain(session, query):
+                print(f"    {step}")
+        problems = check_query_plans(session)
+    for name, scans in problems.items():
+        print(f"Проблема в {name}: {'; '.join(scans)}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Векторный расчёт баллов по колонкам задач (NumPy).
+
+Вместо ORM-объектов из БД читаются только нужные колонки выполненных задач
+(даты, сложность, проект) и связи с исполнителями, баллы всех задач
+считаются одним проходом по массивам. С правилами по умолчанию результат
+совпадает с calculate_task_score; ScoreRules позволяет пересчитать период
+с другими весами сложности и правилами опоздания, ничего не меняя в БД.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Literal, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from TaskBase.models import Employee, EmployeeScore, ProjectScore, Task, TaskExecutor
+
+LATENESS_RULES = ("proportional", "zero", "ignore")
+
+
+@dataclass(frozen=True)
+class ScoreRules:
+    """Правила начисления.
+
+    difficulty_weights — баллы за сложность (по умолчанию балл равен сложности);
+    lateness — опоздание: proportional — балл × план / факт (как сейчас),
+    zero — ноль за опоздание, ignore — полный балл; grace_days — дней после
+    дедлайна, которые ещё не считаются опозданием.
+    """
+    difficulty_weights: dict = field(default_factory=dict)
+    lateness: Literal["proportional", "zero", "ignore"] = "proportional"
+    grace_days: int = 0
+
+    def __post_init__(self):
+        if self.lateness not in LATENESS_RULES:
+            raise ValueError(f"lateness must be one of: {', '.join(LATENESS_RULES)}")
+
+
+DEFAULT_RULES = ScoreRules()
+
+
+@dataclass
+class TaskColumns:
+    """Выполненные задачи в виде массивов; links — пары (индекс задачи, id сотрудника)."""
+    task_ids: np.ndarray
+    created: np.ndarray
+    deadline: np.ndarray
+    completed: np.ndarray
+    difficulty: np.ndarray
+    project_ids: np.ndarray  # -1 — задача без проекта
+    link_tasks: np.ndarray
+    link_employees: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    @property
+    def executor_counts(self) -> np.ndarray:
+        return np.bincount(self.link_tasks, minlength=len(self)).astype(np.int64)
+
+
+def _days(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def completed_filters(from_date: Optional[date] = None, to_date: Optional[date] = None) -> list:
+    """Условия «задача выполнена в периоде» — поиск по индексу completed_date."""
+    filters = [Task.completed_date.isnot(None)]
+    if from_date is not None:
+        filters.append(Task.completed_date >= from_date)
+    if to_date is not None:
+        filters.append(Task.completed_date <= to_date)
+    return filters
+
+
+def load_task_columns(session, from_date: Optional[date] = None, to_date: Optional[date] = None) -> TaskColumns:
+    """Выполненные задачи (по completed_date в периоде, если он задан) двумя запросами."""
+    filters = completed_filters(from_date, to_date)
+
+    rows = session.execute(
+        select(Task.id, Task.created_date, Task.deadline, Task.completed_date, Task.difficulty, Task.project_id)
+        .where(*filters)
+        .order_by(Task.id)
+    ).all()
+    task_ids, created, deadline, completed, difficulty, project_ids = zip(*rows) if rows else ([],) * 6
+
+    links = session.execute(
+        select(TaskExecutor.task_id, TaskExecutor.employee_id)
+        .join(Task, Task.id == TaskExecutor.task_id)
+        .where(*filters)
+    ).all()
+    task_ids = np.array(task_ids, dtype=np.int64)
+    link_task_ids = np.array([task_id for task_id, _ in links], dtype=np.int64)
+
+    return TaskColumns(
+        task_ids=task_ids,
+        created=_days(created),
+        deadline=_days(deadline),
+        completed=_days(completed),
+        difficulty=np.array(difficulty, dtype=np.int64),
+        project_ids=np.array([-1 if p is None else p for p in project_ids], dtype=np.int64),
+        # task_ids отсортированы — позиция задачи находится бинарным поиском
+        link_tasks=np.searchsorted(task_ids, link_task_ids),
+        link_employees=np.array([employee_id for _, employee_id in links], dtype=np.int64),
+    )
+
+
+def score_tasks(columns: TaskColumns, rules: ScoreRules = DEFAULT_RULES) -> np.ndarray:
+    """Балл каждой задачи (на одного исполнителя); с DEFAULT_RULES — как calculate_task_score."""
+    planned = columns.deadline - columns.created + rules.grace_days
+    actual = columns.completed - columns.created
+
+    if rules.difficulty_weights:
+        levels, inverse = np.unique(columns.difficulty, return_inverse=True)
+        weights = np.array([rules.difficulty_weights.get(int(level), level) for level in levels], dtype=np.float64)
+        points = weights[inverse]
+    else:
+        points = columns.difficulty.astype(np.float64)
+
+    on_time = actual <= planned
+    if rules.lateness == "ignore":
+        late = points
+    elif rules.lateness == "zero":
+        late = np.zeros_like(points)
+    else:
+        # порядок операций как в calculate_task_score: сложность × (план / факт)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            late = np.where((planned > 0) & (actual > 0), np.floor(points * (planned / actual)), 0)
+    return np.where(on_time, points, late).astype(np.int64)
+
+
+def _sum_by(keys: np.ndarray, values: np.ndarray) -> dict[int, int]:
+    if len(keys) == 0:
+        return {}
+    unique, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, weights=values, minlength=len(unique))
+    return {int(key): int(total) for key, total in zip(unique, totals)}
+
+
+def score_totals(columns: TaskColumns, scores: np.ndarray) -> dict:
+    """Итоги за период: {"employees": {id: балл}, "projects": {id: балл}}.
+
+    Как в леджере: каждый исполнитель получает балл задачи, проект — балл,
+    умноженный на число исполнителей (минимум 1).
+    """
+    project_scores = scores * np.maximum(columns.executor_counts, 1)
+    with_project = columns.project_ids >= 0
+    return {
+        "employees": _sum_by(columns.link_employees, scores[columns.link_tasks]),
+        "projects": _sum_by(columns.project_ids[with_project], project_scores[with_project]),
+    }
+
+
+def ledger_contribution(columns: TaskColumns, scores: np.ndarray) -> Counter:
+    """Вклад задач в леджер в формате snapshot_task_score: {(модель, id, день): баллы}."""
+    contribution = Counter()
+    days = columns.completed.astype("datetime64[D]").tolist()
+    link_scores = scores[columns.link_tasks].tolist()
+    for position, employee_id, score in zip(columns.link_tasks.tolist(), columns.link_employees.tolist(), link_scores):
+        contribution[(EmployeeScore, employee_id, days[position])] += score
+    project_scores = (scores * np.maximum(columns.executor_counts, 1)).tolist()
+    for project_id, day, score in zip(columns.project_ids.tolist(), days, project_scores):
+        if project_id >= 0:
+            contribution[(ProjectScore, project_id, day)] += score
+    return contribution
+
+
+def simulate_period(session, from_date: date, to_date: date, rules: ScoreRules, top: int = 10) -> dict:
+    """Баллы за период по текущим правилам и по rules — без записи в БД.
+
+    Отдел — сумма по существующим сотрудникам, как в get_department_score.
+    В списках — top сотрудников и проектов с наибольшим изменением.
+    """
+    columns = load_task_columns(session, from_date, to_date)
+    current = score_totals(columns, score_tasks(columns))
+    simulated = score_totals(columns, score_tasks(columns, rules))
+    names = dict(session.execute(select(Employee.id, Employee.name)).all())
+
+    def compare(kind: str, allowed=None) -> list[dict]:
+        ids = set(current[kind]) | set(simulated[kind])
+        if allowed is not None:
+            ids &= allowed
+        rows = [
+            {"id": key, "current": current[kind].get(key, 0), "simulated": simulated[kind].get(key, 0)}
+            for key in ids
+        ]
+        for row in rows:
+            row["delta"] = row["simulated"] - row["current"]
+        rows.sort(key=lambda row: (-abs(row["delta"]), row["id"]))
+        return rows[:top]
+
+    employees = compare("employees", set(names))
+    for row in employees:
+        row["name"] = names[row["id"]]
+    return {
+        "tasks": len(columns),
+        "department": {
+            "current": sum(score for key, score in current["employees"].items() if key in names),
+            "simulated": sum(score for key, score in simulated["employees"].items() if key in names),
+        },
+        "employees": employees,
+        "projects": compare("projects"),
+    }
@@ -0,0 +1,158 @@
+"""Полнотекстовый поиск по сотрудникам, проектам и задачам (SQLite FTS5).
+
+Индекс search_index хранит имя и описание (у сотрудника — должность) каждой
+строки. Токенизатор unicode61 приводит регистр и для кириллицы, «ё» заменяется
+на «е» (и в индексе, и в запросе), слова запроса ищутся по префиксу. rowid записи — id * 4 + код типа, поэтому триггеры на
+INSERT / UPDATE / DELETE обновляют индекс точечно.
+
+Если FTS5 недоступен (другая СУБД или SQLite без расширения), search() ищет
+через ILIKE по именам.
+"""
+import re
+import weakref
+from typing import Iterable, Optional
+
+from sqlalchemy import case, inspect, literal, text, union_all
+
+from TaskBase.models import Employee, Project, Task
+
+SEARCH_TABLE = "search_index"
+
+# тип -> (код в rowid, таблица, колонка описания, модель)
+SEARCH_KINDS = {
+    "employee": (0, "employees", "position", Employee),
+    "project": (1, "projects", "description", Project),
+    "task": (2, "tasks", "description", Task),
+}
+KIND_CODES = 4
+
+# вес совпадения в имени по сравнению с описанием (bm25)
+NAME_WEIGHT = 10.0
+
+_WORD = re.compile(r"\w+")
+
+# есть ли индекс в БД движка (проверяется один раз на движок)
+_indexed_engines = weakref.WeakKeyDictionary()
+
+
+def _rowid(kind: str, alias: str) -> str:
+    return f"{alias}.id * {KIND_CODES} + {SEARCH_KINDS[kind][0]}"
+
+
+def _fold(expression: str) -> str:
+    return f"replace(replace(coalesce({expression}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _values(kind: str, alias: str) -> str:
+    """rowid, name, description, title, kind строки индекса."""
+    description = SEARCH_KINDS[kind][2]
+    return f"{_rowid(kind, alias)}, {_fold(f'{alias}.name')}, {_fold(f'{alias}.{description}')}, {alias}.name, '{kind}'"
+
+
+def search_index_ddl() -> list[str]:
+    """CREATE для таблицы индекса и триггеров (идемпотентно)."""
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        "name, description, title UNINDEXED, kind UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    ]
+    for kind, (_, table, description, _) in SEARCH_KINDS.items():
+        insert_row = f"INSERT INTO {SEARCH_TABLE}(rowid, name, description, title, kind) VALUES ({_values(kind, 'new')});"
+        delete_row = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {_rowid(kind, 'old')};"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN {insert_row} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF name, {description} ON {table} "
+            f"BEGIN {delete_row} {insert_row} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN {delete_row} END",
+        ]
+    return statements
+
+
+def fts5_available(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    options = {row[0] for row in connection.exec_driver_sql("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def create_search_index(engine) -> bool:
+    """Создаёт индекс и триггеры; новый индекс заполняется из таблиц. False — FTS5 нет."""
+    with engine.begin() as conn:
+        if not fts5_available(conn):
+            return False
+        created = not inspect(conn).has_table(SEARCH_TABLE)
+        for statement in search_index_ddl():
+            conn.exec_driver_sql(statement)
+        if created:
+            # ранжирование по умолчанию: совпадение в имени весит больше
+            conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25({NAME_WEIGHT}, 1.0)')"))
+            populate_search_index(conn)
+    return True
+
+
+def populate_search_index(conn) -> None:
+    """Заново заполняет индекс по текущим строкам таблиц."""
+    conn.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+    for kind, (_, table, _, _) in SEARCH_KINDS.items():
+        conn.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, name, description, title, kind) SELECT {_values(kind, table)} FROM {table}"
+        )
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Текст пользователя -> выражение MATCH: все слова, каждое по префиксу."""
+    words = _WORD.findall(query.replace("ё", "е").replace("Ё", "Е"))
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search(session, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> list[dict]:
+    """Результаты по всем типам, лучшие первыми: [{"type", "id", "name", "rank"}]."""
+    kinds = list(kinds or SEARCH_KINDS)
+    expression = match_expression(query)
+    if expression is None or not kinds:
+        return []
+    if not _has_index(session):
+        return _search_like(session, query, kinds, limit)
+
+    placeholders = ", ".join(f":kind{i}" for i in range(len(kinds)))
+    rows = session.execute(
+        text(
+            f"SELECT rowid, kind, title, rank FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :expression AND kind IN ({placeholders}) "
+            "ORDER BY rank LIMIT :limit"
+        ),
+        {"expression": expression, "limit": limit, **{f"kind{i}": kind for i, kind in enumerate(kinds)}},
+    )
+    return [
+        {"type": kind, "id": rowid // KIND_CODES, "name": title, "rank": round(-rank, 4)}
+        for rowid, kind, title, rank in rows
+    ]
+
+
+def _has_index(session) -> bool:
+    engine = session.get_bind()
+    if engine not in _indexed_engines:
+        _indexed_engines[engine] = inspect(session.connection()).has_table(SEARCH_TABLE)
+    return _indexed_engines[engine]
+
+
+def _search_like(session, query: str, kinds: list[str], limit: int) -> list[dict]:
+    # запасной вариант без FTS5: подстрока в имени, ранг — 1 за совпадение с начала имени
+    selects = []
+    for kind in kinds:
+        model = SEARCH_KINDS[kind][3]
+        selects.append(
+            session.query(
+                literal(kind).label("kind"),
+                model.id.label("id"),
+                model.name.label("name"),
+                case((model.name.ilike(f"{query}%"), 1.0), else_=0.0).label("rank"),
+            ).filter(model.name.ilike(f"%{query}%")).statement
+        )
+    combined = union_all(*selects).subquery()
+    rows = session.execute(
+        combined.select().order_by(combined.c.rank.desc(), combined.c.name, combined.c.id).limit(limit)
+    )
+    return [{"type": kind, "id": id_, "name": name, "rank": rank} for kind, id_, name, rank in rows]
@@ -0,0 +1 @@
+"""Бенчмарки backend'а. Запускаются из каталога backend: python -m benchmarks.<модуль>."""
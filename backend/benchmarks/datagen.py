@@ -0,0 +1,147 @@
+"""Синтетические данные для бенчмарков: сотрудники, проекты с этапами и задачи.
+
+    python -m benchmarks.datagen --db ./bench.db --employees 200 --projects 100 --tasks 20000 --seed 1
+
+При одинаковых параметрах и seed получается одна и та же БД (даты — от
+сегодняшнего дня). Проекты создаются через add_project_with_stages, задачи —
+пачками через insert_many, леджер баллов перестраивается в конце.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert, update
+
+from TaskBase import configure_database, init_db
+from TaskBase.logic import add_employees, add_project_with_stages, get_session, insert_many, rebuild_score_ledger
+from TaskBase.models import Employee, Project, ProjectStage, Task, TaskExecutor
+
+POSITIONS = ("инженер", "ведущий инженер", "конструктор", "технолог", "программист", "руководитель группы")
+# число исполнителей задачи: у большинства один, у некоторых нет вовсе
+FAN_OUT = (0, 1, 2, 3, 4)
+FAN_OUT_WEIGHTS = (5, 60, 25, 8, 2)
+DIFFICULTIES = (1, 2, 4)
+HISTORY_DAYS = 730
+BATCH_SIZE = 5000
+
+
+def generate(session, employees: int, projects: int, tasks: int, seed: int = 0, today: date | None = None) -> dict:
+    """Заполняет пустую БД и возвращает число созданных строк по таблицам."""
+    rnd = random.Random(seed)
+    today = today or date.today()
+    started = time.perf_counter()
+
+    employee_ids = add_employees(session, [
+        {
+            "name": f"Сотрудник {i:05d}",
+            "position": rnd.choice(POSITIONS),
+            "start_date": today - timedelta(days=rnd.randint(30, HISTORY_DAYS * 2)),
+        }
+        for i in range(employees)
+    ])
+    # часть сотрудников в отпуске или уволена
+    for employee_id in rnd.sample(employee_ids, len(employee_ids) // 10):
+        status = rnd.choice(("в отпуске", "уволен"))
+        session.execute(
+            update(Employee).where(Employee.id == employee_id)
+            .values(status=status, status_start=today - timedelta(days=rnd.randint(1, 90)))
+        )
+
+    stages_by_project = {}
+    for i in range(projects):
+        created = today - timedelta(days=rnd.randint(0, HISTORY_DAYS))
+        deadline = created + timedelta(days=rnd.randint(60, 540))
+        project = add_project_with_stages(session, f"Проект {i:04d}", "синтетический проект", deadline)
+        values = {"created_date": created}
+        if deadline < today and rnd.random() < 0.7:
+            values.update(status="завершен", completed_date=deadline + timedelta(days=rnd.randint(-30, 30)))
+        elif deadline < today:
+            values.update(status="просрочено")
+        session.execute(update(Project).where(Project.id == project.id).values(**values))
+        stages_by_project[project.id] = [stage.id for stage in project.stages]
+    session.commit()
+
+    project_ids = list(stages_by_project)
+    links = 0
+    for offset in range(0, tasks, BATCH_SIZE):
+        rows, executors = [], []
+        for i in range(offset, min(offset + BATCH_SIZE, tasks)):
+            row = _task_row(rnd, i, today)
+            if project_ids and rnd.random() < 0.7:
+                row["project_id"] = rnd.choice(project_ids)
+                row["stage_id"] = rnd.choice(stages_by_project[row["project_id"]])
+            rows.append(row)
+            fan_out = rnd.choices(FAN_OUT, FAN_OUT_WEIGHTS)[0]
+            executors.append(rnd.sample(employee_ids, min(fan_out, len(employee_ids))))
+
+        ids = insert_many(session, Task, rows)
+        executor_rows = [
+            {"task_id": task_id, "employee_id": employee_id}
+            for task_id, task_executors in zip(ids, executors)
+            for employee_id in task_executors
+        ]
+        if executor_rows:
+            session.execute(insert(TaskExecutor), executor_rows)
+        links += len(executor_rows)
+        session.commit()
+
+    ledger_rows = rebuild_score_ledger(session)
+    session.commit()
+    return {
+        "employees": employees,
+        "projects": projects,
+        "stages": session.query(ProjectStage).count(),
+        "tasks": tasks,
+        "task_executors": links,
+        "ledger_rows": ledger_rows,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def _task_row(rnd: random.Random, i: int, today: date) -> dict:
+    created = today - timedelta(days=rnd.randint(0, HISTORY_DAYS))
+    deadline = created + timedelta(days=rnd.randint(1, 60))
+    row = {
+        "name": f"Задача {i:07d}",
+        "description": "синтетическая задача",
+        "created_date": created,
+        "deadline": deadline,
+        "completed_date": None,
+        "difficulty": rnd.choice(DIFFICULTIES),
+        "status": "в работе",
+        "project_id": None,
+        "stage_id": None,
+    }
+    # прошедшие задачи почти все выполнены, часть — с опозданием
+    done_probability = 0.9 if deadline < today else 0.3
+    if rnd.random() < done_probability:
+        completed = created + timedelta(days=max(0, round(rnd.gauss((deadline - created).days, 7))))
+        if completed <= today:
+            row.update(status="выполнено", completed_date=completed)
+    if row["status"] == "в работе" and deadline < today:
+        row["status"] = "просрочено"
+    return row
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.datagen", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="путь к новому SQLite-файлу")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    configure_database(f"sqlite:///{args.db}")
+    init_db()
+    with get_session() as session:
+        if session.query(Task.id).first() is not None:
+            parser.error(f"{args.db} уже содержит задачи")
+        counts = generate(session, args.employees, args.projects, args.tasks, args.seed)
+    print(json.dumps(counts, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
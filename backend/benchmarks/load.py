@@ -0,0 +1,148 @@
+"""Нагрузочное сравнение sync- и async-режимов API (настройка DB_ASYNC).
+
+    python -m benchmarks.load --db ./database.db --concurrency 64 --duration 10
+
+Для каждого режима поднимает uvicorn на копии указанной БД, в течение
+duration секунд шлёт запросы с заданной конкурентностью по смеси читающих
+эндпоинтов и печатает запросы/сек и задержки p50/p95. Нужен httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: Path, port: int, async_mode: bool) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        DB_ASYNC="true" if async_mode else "false",
+        ADMIN_DELETE_PASSWORD=os.environ.get("ADMIN_DELETE_PASSWORD", "benchmark"),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/stats/department_name")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"сервер {base_url} не запустился за {timeout} с")
+
+
+def request_mix(employee_ids: list[int]) -> list[str]:
+    today = date.today()
+    period = f"from_date={today - timedelta(days=365)}&to_date={today}"
+    paths = [
+        f"/employees/top?{period}&n=5",
+        f"/stats/department_score?{period}",
+        f"/tasks/?{period}",
+        f"/projects/?{period}",
+        f"/projects/scores?{period}",
+    ]
+    for employee_id in employee_ids[:20]:
+        paths.append(f"/employees/{employee_id}/score?{period}")
+        paths.append(f"/employees/{employee_id}/tasks?{period}")
+    return paths
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, seed: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        employee_ids = [e["id"] for e in (await client.get("/employees/")).json()]
+        paths = request_mix(employee_ids)
+        stop_at = time.monotonic() + duration
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            rnd = random.Random(seed + worker_id)
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                response = await client.get(rnd.choice(paths))
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+    }
+
+
+async def benchmark_mode(db: Path, async_mode: bool, concurrency: int, duration: float, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = Path(tmp) / "database.db"
+        shutil.copy(db, db_copy)
+        port = free_port()
+        server = start_server(db_copy, port, async_mode)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_ready(base_url)
+            return await run_load(base_url, concurrency, duration, seed)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+async def main_async(args) -> dict:
+    report = {"concurrency": args.concurrency, "duration_s": args.duration}
+    for mode in args.modes:
+        report[mode] = await benchmark_mode(Path(args.db).resolve(), mode == "async", args.concurrency, args.duration, args.seed)
+        print(f"{mode:>5}: {report[mode]}", file=sys.stderr)
+    if "sync" in report and "async" in report and report["sync"]["rps"]:
+        report["async_vs_sync_rps"] = round(report["async"]["rps"] / report["sync"]["rps"], 2)
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", required=True, help="SQLite-файл с данными (используется его копия)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(main_async(args)), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Воспроизводимый бенчмарк горячих эндпоинтов на синтетических данных.
+
+    python -m benchmarks.suite --sizes small medium --repeat 30 --out report.json
+    python -m benchmarks.suite --compare before.json after.json
+
+Для каждого размера создаёт временную SQLite-БД (benchmarks.datagen с
+заданным seed), вызывает эндпоинты in-process через TestClient и пишет
+JSON-отчёт: задержки p50/p95, число SQL-запросов на запрос и пиковую память
+(tracemalloc) по каждому эндпоинту. Кэш ответов на время замеров выключен.
+Отчёты разных коммитов сравниваются через --compare.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from benchmarks.datagen import generate
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# сотрудники, проекты, задачи
+SIZES = {
+    "small": (50, 20, 2_000),
+    "medium": (200, 100, 20_000),
+    "large": (500, 300, 100_000),
+}
+
+
+class QueryCounter:
+    """Считает SQL-запросы всех движков (before_cursor_execute)."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def endpoints(employee_ids: list[int], seed: int) -> dict:
+    """{имя: функция, возвращающая путь i-го запроса}."""
+    today = date.today()
+    period = f"from_date={today - timedelta(days=365)}&to_date={today}"
+    order = random.Random(seed).sample(employee_ids, len(employee_ids))
+    return {
+        "employees_top": lambda i: f"/employees/top?{period}&n=10",
+        "department_score": lambda i: f"/stats/department_score?{period}",
+        "tasks": lambda i: f"/tasks/?{period}",
+        "projects": lambda i: f"/projects/?{period}",
+        "employee_tasks": lambda i: f"/employees/{order[i % len(order)]}/tasks?{period}",
+    }
+
+
+def percentile(sorted_values: list[float], share: float) -> float:
+    """Перцентиль по ближайшему рангу: p95 из 30 замеров — 29-й, из 3 — максимум."""
+    return sorted_values[max(math.ceil(len(sorted_values) * share) - 1, 0)]
+
+
+def measure(client, path_for, repeat: int, warmup: int, counter: QueryCounter) -> dict:
+    for i in range(warmup):
+        client.get(path_for(i)).raise_for_status()
+
+    latencies = []
+    queries_before = counter.count
+    for i in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path_for(i))
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    queries = (counter.count - queries_before) / repeat
+
+    # память — отдельным запросом: под tracemalloc задержки не показательны
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    response = client.get(path_for(0))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "queries": round(queries, 2),
+        "peak_kb": round(peak / 1024, 1),
+        "response_kb": round(len(response.content) / 1024, 1),
+    }
+
+
+def run_size(name: str, db_path: Path, args, counter: QueryCounter) -> dict:
+    from fastapi.testclient import TestClient
+
+    import main
+    from settings import settings
+    from TaskBase import configure_database, init_db
+    from TaskBase.logic import get_session
+    from TaskBase.models import Employee
+
+    configure_database(
+        f"sqlite:///{db_path}",
+        sqlite_pragmas=settings.sqlite_pragmas(),
+        read_engine_enabled=settings.DB_READ_ENGINE,
+        **settings.pool_options(),
+    )
+    init_db()
+    employees, projects, tasks = SIZES[name]
+    with get_session() as session:
+        data = generate(session, employees, projects, tasks, args.seed)
+        employee_ids = [employee_id for (employee_id,) in session.query(Employee.id).order_by(Employee.id)]
+    print(f"{name}: данные {data}", file=sys.stderr)
+
+    # без контекста TestClient: startup (планировщик) не запускается
+    client = TestClient(main.app)
+    results = {}
+    for endpoint, path_for in endpoints(employee_ids, args.seed).items():
+        results[endpoint] = measure(client, path_for, args.repeat, args.warmup, counter)
+        print(f"{name:>6} {endpoint:<17} {results[endpoint]}", file=sys.stderr)
+    return {"data": data, "endpoints": results}
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_paths = {name: Path(tmp) / f"{name}.db" for name in args.sizes}
+        # настройки читаются при импорте main — до него задаём окружение
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_paths[args.sizes[0]]}"
+        os.environ["CACHE_ENABLED"] = "false"
+        os.environ.setdefault("ADMIN_DELETE_PASSWORD", "benchmark")
+        from settings import settings
+        from TaskBase import get_engine
+
+        counter = QueryCounter()
+        sizes = {name: run_size(name, db_paths[name], args, counter) for name in args.sizes}
+        get_engine().dispose()
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "sqlalchemy": sqlalchemy.__version__,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "settings": {
+                "DB_ASYNC": settings.DB_ASYNC,
+                "DB_READ_ENGINE": settings.DB_READ_ENGINE,
+                "SQLITE_TUNING": settings.SQLITE_TUNING,
+                "STATUS_ON_READ": settings.STATUS_ON_READ,
+            },
+        },
+        "sizes": sizes,
+    }
+
+
+def compare(before: dict, after: dict) -> list[dict]:
+    """Изменения по общим размерам и эндпоинтам: отношение after / before."""
+    rows = []
+    for size, result in after["sizes"].items():
+        old = before["sizes"].get(size)
+        if old is None:
+            continue
+        for endpoint, new in result["endpoints"].items():
+            prev = old["endpoints"].get(endpoint)
+            if prev is None:
+                continue
+            rows.append({
+                "size": size,
+                "endpoint": endpoint,
+                "p50_ratio": round(new["p50_ms"] / prev["p50_ms"], 2) if prev["p50_ms"] else None,
+                "p95_ratio": round(new["p95_ms"] / prev["p95_ms"], 2) if prev["p95_ms"] else None,
+                "queries": f"{prev['queries']} -> {new['queries']}",
+                "peak_kb": f"{prev['peak_kb']} -> {new['peak_kb']}",
+            })
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=30, help="замеров на эндпоинт")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="файл для JSON-отчёта (по умолчанию — stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="сравнить два отчёта")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        before, after = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare)
+        for row in compare(before, after):
+            print(json.dumps(row, ensure_ascii=False))
+        return
+
+    report = json.dumps(run(args), ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
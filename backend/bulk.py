@@ -0,0 +1,64 @@
+"""Общая часть пакетных эндпоинтов (/tasks/bulk, /employees/bulk).
+
+Каждый элемент пакета валидируется той же pydantic-моделью, что и в одиночном
+эндпоинте; ответ содержит результат по каждому элементу:
+
+    {"succeeded": 2, "failed": 1, "results": [
+        {"index": 0, "status": "created", "id": 10},
+        {"index": 1, "status": "error", "errors": [...]},
+        ...]}
+
+Код ответа: 200 — все элементы применены, 207 — часть элементов отклонена,
+422 — не применено ничего (все элементы с ошибками или atomic=true).
+"""
+from typing import Any, Dict, List
+
+from fastapi import Body, HTTPException, Query
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ValidationError
+
+from settings import settings
+
+
+def batch_body(items: List[Dict[str, Any]] = Body(..., description="Элементы пакета")) -> List[Dict[str, Any]]:
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch is limited to {settings.BULK_MAX_ITEMS} items")
+    return items
+
+
+def atomic_param(atomic: bool = Query(False, description="Не применять ничего, если хотя бы один элемент с ошибкой")) -> bool:
+    return atomic
+
+
+def validate_batch(model: type[BaseModel], items: List[Dict[str, Any]]):
+    """Валидирует элементы моделью. Возвращает ({индекс: модель}, {индекс: ошибки})."""
+    valid, errors = {}, {}
+    for index, item in enumerate(items):
+        try:
+            valid[index] = model.model_validate(item)
+        except ValidationError as e:
+            errors[index] = [
+                {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+                for err in e.errors()
+            ]
+    return valid, errors
+
+
+def bulk_response(total: int, applied: Dict[int, dict], errors: Dict[int, list]) -> JSONResponse:
+    """Собирает ответ с результатами по элементам; applied — {индекс: результат}."""
+    results = []
+    for index in range(total):
+        if index in errors:
+            results.append({"index": index, "status": "error", "errors": errors[index]})
+        else:
+            results.append({"index": index, **applied.get(index, {"status": "skipped"})})
+
+    if not errors:
+        status_code = 200
+    elif applied:
+        status_code = 207
+    else:
+        status_code = 422
+    body = {"succeeded": len(applied), "failed": len(errors), "results": results}
+    return JSONResponse(status_code=status_code, content=jsonable_encoder(body))
@@ -0,0 +1,214 @@
+"""In-process кэш ответов читающих маршрутов: TTL, LRU-вытеснение, инвалидация по тегам и ETag.
+
+Маршруты подключаются декораторами поверх функции-обработчика (роутер должен
+использовать route_class=CachedRoute):
+
+    @router.get("/{employee_id}")
+    @cached("employee:{employee_id}")
+    def get_emp(...): ...
+
+    @router.put("/{employee_id}")
+    @invalidates("employee:{employee_id}", "employees")
+    def update_employee(...): ...
+
+В тегах можно ссылаться на параметры пути. Ключ кэша — путь и отсортированные
+query-параметры. Пишущий маршрут после успешного ответа сбрасывает все записи
+со своими тегами.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from settings import settings
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    media_type: str
+    etag: str
+    tags: frozenset
+    expires_at: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds: float, max_entries: int, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.stats = CacheStats()
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._tag_versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def tag_versions(self, tags) -> tuple:
+        with self._lock:
+            return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def set(self, key: tuple, body: bytes, media_type: str, tags, versions: tuple) -> CacheEntry:
+        """Сохраняет ответ; если теги успели инвалидировать за время запроса — не сохраняет."""
+        entry = CacheEntry(
+            body=body,
+            media_type=media_type,
+            etag=make_etag(body),
+            tags=frozenset(tags),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            if tuple(self._tag_versions.get(tag, 0) for tag in tags) != versions:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return entry
+
+    def invalidate(self, *tags: str) -> int:
+        """Удаляет записи с любым из тегов. Возвращает число удалённых записей."""
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry.tags & tags]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+            return len(stale)
+
+    def mark_not_modified(self) -> None:
+        with self._lock:
+            self.stats.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.stats.hits,
+                "misses": self.stats.misses,
+                "not_modified": self.stats.not_modified,
+                "evictions": self.stats.evictions,
+                "invalidations": self.stats.invalidations,
+            }
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+response_cache = ResponseCache(
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    enabled=settings.CACHE_ENABLED,
+)
+
+
+def cached(*tags: str):
+    """Помечает GET-обработчик как кэшируемый с указанными тегами."""
+    def decorator(endpoint):
+        endpoint.cache_tags = tags
+        return endpoint
+    return decorator
+
+
+def invalidates(*tags: str):
+    """Помечает пишущий обработчик: после успешного ответа сбросить записи с этими тегами."""
+    def decorator(endpoint):
+        endpoint.invalidates_tags = tags
+        return endpoint
+    return decorator
+
+
+def _resolve_tags(tags, request: Request) -> list[str]:
+    return [tag.format(**request.path_params) for tag in tags]
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [value.strip() for value in header.split(",")]
+
+
+class CachedRoute(APIRoute):
+    """APIRoute, который учитывает пометки @cached / @invalidates на обработчике."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        cache_tags = getattr(self.endpoint, "cache_tags", None)
+        invalidates_tags = getattr(self.endpoint, "invalidates_tags", None)
+        if cache_tags is not None:
+            return self._caching_handler(handler, cache_tags)
+        if invalidates_tags is not None:
+            return self._invalidating_handler(handler, invalidates_tags)
+        return handler
+
+    @staticmethod
+    def _caching_handler(handler, cache_tags):
+        async def caching_handler(request: Request) -> Response:
+            if not response_cache.enabled:
+                return await handler(request)
+
+            key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+            entry = response_cache.get(key)
+            cache_status = "HIT"
+            if entry is None:
+                tags = _resolve_tags(cache_tags, request)
+                versions = response_cache.tag_versions(tags)
+                response = await handler(request)
+                body = getattr(response, "body", None)
+                if response.status_code != 200 or body is None:
+                    return response
+                entry = response_cache.set(key, body, response.media_type, tags, versions)
+                cache_status = "MISS"
+
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": cache_status}
+            if _etag_matches(request, entry.etag):
+                response_cache.mark_not_modified()
+                return Response(status_code=304, headers=headers)
+            return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+        return caching_handler
+
+    @staticmethod
+    def _invalidating_handler(handler, invalidates_tags):
+        async def invalidating_handler(request: Request) -> Response:
+            response = await handler(request)
+            if response.status_code < 400:
+                response_cache.invalidate(*_resolve_tags(invalidates_tags, request))
+            return response
+
+        return invalidating_handler
@@ -0,0 +1,169 @@
+"""Лента изменений: in-process шина событий для /changes (SSE и WebSocket).
+
+Пишущие маршруты задач, проектов и сотрудников и пересчёт просроченных после
+успешного commit публикуют событие: сущность, действие и id затронутых строк
+(для одиночного обновления — ещё и изменённые поля). Клиент применяет эти
+дельты вместо повторной загрузки списков. Событие с пустым ids означает
+«изменилось много строк» (импорт) — список сущности нужно перечитать.
+
+Последние CHANGES_BUFFER_SIZE событий хранятся в кольцевом буфере, поэтому
+переподключившийся клиент получает пропущенное по Last-Event-ID. Если нужное
+событие уже вытеснено или id выдан до перезапуска процесса, вместо него
+приходит reset — всё состояние перечитывается. Шина живёт в памяти процесса:
+при нескольких воркерах uvicorn у каждого своя лента.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from settings import settings
+
+ENTITIES = ("task", "project", "employee")
+# событий в очереди одного подписчика; отставший получает reset
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    epoch: str
+    seq: int
+    entity: str
+    action: str  # created / updated / deleted / overdue / imported
+    ids: tuple = ()
+    data: Optional[dict] = None
+    at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    @property
+    def id(self) -> str:
+        return f"{self.epoch}-{self.seq}"
+
+    def as_dict(self) -> dict:
+        event = {"id": self.id, "entity": self.entity, "action": self.action, "ids": list(self.ids), "at": self.at}
+        if self.data is not None:
+            event["data"] = self.data
+        return event
+
+    def matches(self, entities: Optional[set] = None, ids: Optional[set] = None) -> bool:
+        if entities is not None and self.entity not in entities:
+            return False
+        # пустой ids — «много строк», подходит под любой фильтр по id
+        return ids is None or not self.ids or not ids.isdisjoint(self.ids)
+
+
+# маркер в очереди подписчика: события потеряны, клиенту нужен reset
+RESET = object()
+
+
+class Subscription:
+    """Очередь событий одного клиента в его event loop."""
+
+    def __init__(self, feed: "ChangeFeed"):
+        self.feed = feed
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def push(self, event: ChangeEvent) -> None:
+        # publish вызывается из потоков пула, очередь принадлежит event loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:  # loop уже закрыт
+            self.feed.unsubscribe(self)
+
+    def _put(self, event: ChangeEvent) -> None:
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESET
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float):
+        """Следующее событие или RESET; asyncio.TimeoutError, если событий не было timeout секунд."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class ChangeFeed:
+    def __init__(self, buffer_size: int):
+        # эпоха отличает id событий разных запусков процесса
+        self.epoch = format(time.time_ns() // 1_000_000, "x")
+        self._seq = 0
+        self._buffer: deque[ChangeEvent] = deque(maxlen=buffer_size)
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, entity: str, action: str, ids: Iterable[int] = (), data: Optional[dict] = None) -> ChangeEvent:
+        if entity not in ENTITIES:
+            raise ValueError(f"entity must be one of: {', '.join(ENTITIES)}")
+        with self._lock:
+            self._seq += 1
+            event = ChangeEvent(self.epoch, self._seq, entity, action, tuple(ids),
+                                jsonable_encoder(data) if data is not None else None)
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(event)
+        return event
+
+    def _since(self, last_event_id: Optional[str]) -> Optional[list[ChangeEvent]]:
+        # вызывается под блокировкой; None — пропущенные события восстановить нельзя
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        if self._buffer and seq < self._buffer[0].seq - 1:
+            return None
+        return [event for event in self._buffer if event.seq > seq]
+
+    def since(self, last_event_id: Optional[str]) -> Optional[list[ChangeEvent]]:
+        """События после last_event_id из буфера; None — нужен reset."""
+        with self._lock:
+            return self._since(last_event_id)
+
+    def recent(self) -> list[ChangeEvent]:
+        with self._lock:
+            return list(self._buffer)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> tuple[Subscription, Optional[list[ChangeEvent]]]:
+        """Подписка и события, пропущенные после last_event_id (атомарно — без пропусков между ними)."""
+        subscription = Subscription(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+            return subscription, self._since(last_event_id)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def last_event_id(self) -> Optional[str]:
+        with self._lock:
+            return self._buffer[-1].id if self._buffer else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"epoch": self.epoch, "published": self._seq, "buffered": len(self._buffer),
+                    "subscribers": len(self._subscribers)}
+
+
+change_feed = ChangeFeed(buffer_size=settings.CHANGES_BUFFER_SIZE)
+
+
+def sse_message(event) -> str:
+    """Кадр text/event-stream: change или reset.
+
+    У reset id последнего события: клиент перечитывает состояние и дальше
+    возобновляется уже с него, а не со старого Last-Event-ID.
+    """
+    if event is RESET:
+        last_event_id = change_feed.last_event_id
+        frame = f"id: {last_event_id}\n" if last_event_id else ""
+        return frame + f"event: reset\ndata: {json.dumps({'last_event_id': last_event_id})}\n\n"
+    return f"id: {event.id}\nevent: change\ndata: {json.dumps(event.as_dict(), ensure_ascii=False)}\n\n"
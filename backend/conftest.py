@@ -0,0 +1,46 @@
+"""Общие фикстуры тестов бэкенда: pytest запускается из backend/."""
+import os
+
+# settings читаются при импорте модулей приложения
+os.environ.setdefault("ADMIN_DELETE_PASSWORD", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from TaskBase import init_db
+from TaskBase.logic import get_session
+from TaskBase.models import configure_database
+from querywatch import query_budget as _query_budget
+
+
+def _use_database(path) -> None:
+    configure_database(f"sqlite:///{path}")
+    init_db()
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Сессия к пустой SQLite-базе со схемой и индексами init_db."""
+    _use_database(tmp_path / "test.db")
+    db = get_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    """TestClient приложения на пустой базе (без startup — без планировщика)."""
+    from main import app  # импорт main настраивает БД из settings, поэтому до подмены
+
+    _use_database(tmp_path / "test.db")
+    return TestClient(app)
+
+
+@pytest.fixture
+def query_budget():
+    """with query_budget(max_queries, max_repeats): ... — бюджет запросов к БД в тесте."""
+    return _query_budget
@@ -1,6 +1,8 @@
-from TaskBase.logic import get_session
+from datetime import date
+from TaskBase.logic import get_session, get_read_session, series_bucket_count
 from sqlalchemy.orm import Session
-from fastapi import Header, HTTPException, status
+from fastapi import Header, HTTPException, Query, status
+from typing import List, Literal, NamedTuple, Optional
 from settings import settings
 
 async def require_delete_password(
@@ -16,3 +18,78 @@ def get_db() -> Session:
         yield session
     finally:
         session.close()
+
+
+async def get_async_db():
+    """AsyncSession для async-маршрутов (режим DB_ASYNC)."""
+    from TaskBase.aio import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def get_read_db() -> Session:
+    """Сессия для GET-маршрутов: read-only движок, если он включён (DB_READ_ENGINE)."""
+    session = get_read_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def parse_id_list(ids: str = Query("all", description='Список id через запятую или "all"')) -> Optional[List[int]]:
+    """Разбирает параметр ids для пакетных эндпоинтов. None означает «все»."""
+    if ids.strip().lower() == "all":
+        return None
+    try:
+        return [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be 'all' or comma-separated integers")
+
+
+class Page(NamedTuple):
+    limit: Optional[int]
+    cursor: Optional[str]
+
+
+def page_params(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description="Размер страницы; без него — весь список"),
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+) -> Page:
+    if cursor and limit is None:
+        limit = settings.PAGE_SIZE_DEFAULT
+    return Page(limit, cursor)
+
+
+def field_list(allowed):
+    """Зависимость для параметра fields (через запятую) с проверкой допустимых полей. None — все поля."""
+    def parse_fields(fields: Optional[str] = Query(None, description="Поля ответа через запятую")) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in names if f not in allowed]
+        if unknown or not names:
+            raise HTTPException(status_code=422, detail=f"fields must be a subset of: {', '.join(allowed)}")
+        return names
+    return parse_fields
+
+
+class SeriesPeriod(NamedTuple):
+    from_date: date
+    to_date: date
+    granularity: str
+
+
+def series_period(
+    from_date: date,
+    to_date: date,
+    granularity: Literal["week", "month", "quarter"] = "month",
+) -> SeriesPeriod:
+    """Период ряда баллов; больше SCORE_SERIES_MAX_BUCKETS интервалов — 422 до запроса к БД."""
+    buckets = series_bucket_count(from_date, to_date, granularity)
+    if buckets > settings.SCORE_SERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"period spans {buckets} {granularity} buckets, max {settings.SCORE_SERIES_MAX_BUCKETS}",
+        )
+    return SeriesPeriod(from_date, to_date, granularity)
@@ -1,30 +1,88 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from routers import employees, projects, tasks, stats
-from TaskBase import init_db
-from TaskBase.logic import check_and_update_overdue_status
+from apscheduler.triggers.interval import IntervalTrigger
+from cache import response_cache
+from changes import change_feed
+from metrics import install as install_metrics, track_job
+from querywatch import install as install_querywatch
+from routers import aio, changes, employees, export, importer, projects, search, tasks, stats
+from settings import settings
+from TaskBase import configure_database, get_engine, init_db
+from TaskBase.aio import configure_async_database, dispose_async_database
+from TaskBase.logic import check_and_update_overdue_status, configure_status_mode
+from TaskBase.pagination import InvalidCursor
 
 app = FastAPI(
     title="Task Tracking API"
 )
 
+# профиль SQLite (WAL, busy_timeout, ...), пул и read-only движок — из settings
+configure_database(
+    sqlite_pragmas=settings.sqlite_pragmas(),
+    read_engine_enabled=settings.DB_READ_ENGINE,
+    read_url=settings.DATABASE_READ_URL,
+    **settings.pool_options(),
+)
 init_db()
+configure_status_mode(on_read=settings.STATUS_ON_READ)
+
+if settings.DB_ASYNC:
+    configure_async_database(
+        settings.ASYNC_DATABASE_URL or get_engine().url.render_as_string(hide_password=False),
+        sqlite_pragmas=settings.sqlite_pragmas(),
+        **settings.pool_options(),
+    )
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
 
 scheduler = AsyncIOScheduler()
 
+def update_overdue_statuses():
+    with track_job("overdue"):
+        run = check_and_update_overdue_status(batch_size=settings.OVERDUE_BATCH_SIZE)
+    # сбрасываем кэш только по тому, что действительно поменялось
+    tags = [f"task:{task_id}" for task_id in run.task_ids] + [f"project:{project_id}" for project_id in run.project_ids]
+    if run.task_ids:
+        tags.append("tasks")
+    if run.project_ids:
+        tags.append("projects")
+    if tags:
+        response_cache.invalidate(*tags)
+    if run.task_ids:
+        change_feed.publish("task", "overdue", run.task_ids)
+    if run.project_ids:
+        change_feed.publish("project", "overdue", run.project_ids)
+
+def expire_status_cache():
+    # статус при чтении зависит от даты: в полночь закэшированные ответы устаревают
+    response_cache.invalidate("tasks", "projects")
+
 @app.on_event("startup")
 async def startup():
+    if settings.STATUS_ON_READ:
+        scheduler.add_job(
+            expire_status_cache,
+            CronTrigger(hour=0, minute=0),
+            id="status_day_change",
+            replace_existing=True,
+        )
+        scheduler.start()
+        return
+
     # 1) единоразово на запуске
-    await run_in_threadpool(check_and_update_overdue_status)
+    await run_in_threadpool(update_overdue_statuses)
 
     # 2) дальше — по расписанию
     scheduler.add_job(
-        check_and_update_overdue_status,
-        CronTrigger(hour=0, minute=10),
-        id="overdue_daily",
+        update_overdue_statuses,
+        IntervalTrigger(minutes=settings.OVERDUE_INTERVAL_MINUTES),
+        id="overdue",
         replace_existing=True,
         coalesce=True,
         max_instances=1,
@@ -34,11 +92,26 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown():
     scheduler.shutdown(wait=False)
+    await dispose_async_database()
+
+if settings.DB_ASYNC:
+    # читающие маршруты — async-версии на тех же путях
+    for router in (employees.router, projects.router, tasks.router, stats.router):
+        aio.install(router)
 
 app.include_router(employees.router, tags=["Employees"])
 app.include_router(projects.router, tags=["Projects"])
 app.include_router(tasks.router, tags=["Tasks"])
 app.include_router(stats.router, tags=["Statistics"])
+app.include_router(export.router, tags=["Export"])
+app.include_router(importer.router, tags=["Import"])
+app.include_router(search.router, tags=["Search"])
+app.include_router(changes.router, tags=["Changes"])
+
+# /metrics, замеры маршрутов и запросов к БД (METRICS_ENABLED)
+install_metrics(app)
+# N+1 и медленные запросы в лог (QUERY_WATCH)
+install_querywatch(app)
 
 origins = [
     "http://localhost:5173"
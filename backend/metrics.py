@@ -0,0 +1,267 @@
+"""Метрики процесса в формате Prometheus (text exposition 0.0.4) на /metrics.
+
+MetricsMiddleware (ASGI) замеряет каждый запрос: число ответов по маршруту,
+методу и коду и гистограмму длительности по шаблону маршрута
+(/tasks/{task_id}, а не конкретному пути). События движков SQLAlchemy
+считают запросы к БД, их время и затронутые строки (rowcount у
+INSERT/UPDATE/DELETE) и относят их к текущему запросу или фоновой задаче
+(track_job). Всё хранится в памяти процесса; на запрос — несколько
+perf_counter и одна блокировка.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from cache import response_cache
+from changes import change_feed
+from settings import settings
+from TaskBase.logic import overdue_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+@dataclass
+class Scope:
+    """Запрос или фоновая задача, к которой относятся запросы к БД."""
+    label: str
+    queries: int = 0
+    rows: int = 0
+    db_seconds: float = 0.0
+
+
+_current: ContextVar[Scope | None] = ContextVar("metrics_scope", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = {}          # (method, route, status) -> число
+        self.latency: dict[tuple, Histogram] = {}     # (method, route) -> секунды
+        self.request_queries: dict[tuple, Histogram] = {}
+        self.db_queries: dict[str, int] = {}          # метка scope -> запросы
+        self.db_rows: dict[str, int] = {}
+        self.db_seconds: dict[str, float] = {}
+        self.jobs: dict[tuple, int] = {}              # (job, результат) -> число
+        self.job_latency: dict[str, Histogram] = {}
+        self.in_flight = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, scope: Scope) -> None:
+        with self._lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self._histogram(self.latency, (method, route), LATENCY_BUCKETS).observe(seconds)
+            self._histogram(self.request_queries, (method, route), QUERY_COUNT_BUCKETS).observe(scope.queries)
+            self._add_db(scope)
+
+    def observe_job(self, name: str, ok: bool, seconds: float, scope: Scope) -> None:
+        with self._lock:
+            key = (name, "ok" if ok else "error")
+            self.jobs[key] = self.jobs.get(key, 0) + 1
+            self._histogram(self.job_latency, name, JOB_BUCKETS).observe(seconds)
+            self._add_db(scope)
+
+    def observe_untracked(self, rows: int, seconds: float) -> None:
+        # запросы вне запроса и фоновой задачи (миграции, CLI)
+        with self._lock:
+            self._add_db(Scope("other", 1, rows, seconds))
+
+    def _add_db(self, scope: Scope) -> None:
+        if not scope.queries:
+            return
+        self.db_queries[scope.label] = self.db_queries.get(scope.label, 0) + scope.queries
+        self.db_rows[scope.label] = self.db_rows.get(scope.label, 0) + scope.rows
+        self.db_seconds[scope.label] = self.db_seconds.get(scope.label, 0.0) + scope.db_seconds
+
+    @staticmethod
+    def _histogram(store: dict, key, buckets) -> Histogram:
+        histogram = store.get(key)
+        if histogram is None:
+            histogram = store[key] = Histogram(buckets)
+        return histogram
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        out = []
+        with self._lock:
+            _counter(out, "http_requests_total", "Ответы по маршруту, методу и коду.",
+                     (({"method": m, "route": r, "status": s}, v) for (m, r, s), v in self.requests.items()))
+            out.append("# HELP http_requests_in_flight Запросы в обработке.")
+            out.append("# TYPE http_requests_in_flight gauge")
+            out.append(f"http_requests_in_flight {self.in_flight}")
+            _histograms(out, "http_request_duration_seconds", "Длительность обработки запроса.",
+                        (({"method": m, "route": r}, h) for (m, r), h in self.latency.items()))
+            _histograms(out, "http_request_db_queries", "Запросов к БД на один HTTP-запрос.",
+                        (({"method": m, "route": r}, h) for (m, r), h in self.request_queries.items()))
+            _counter(out, "db_queries_total", "Запросы к БД (маршрут, job:<имя> или other).",
+                     (({"scope": k}, v) for k, v in self.db_queries.items()))
+            _counter(out, "db_query_seconds_total", "Суммарное время запросов к БД.",
+                     (({"scope": k}, round(v, 6)) for k, v in self.db_seconds.items()))
+            _counter(out, "db_rows_affected_total", "Строки, изменённые INSERT/UPDATE/DELETE.",
+                     (({"scope": k}, v) for k, v in self.db_rows.items()))
+            _counter(out, "job_runs_total", "Запуски фоновых задач.",
+                     (({"job": j, "result": r}, v) for (j, r), v in self.jobs.items()))
+            _histograms(out, "job_duration_seconds", "Длительность фоновых задач.",
+                        (({"job": j}, h) for j, h in self.job_latency.items()))
+
+        overdue = overdue_stats.snapshot()
+        _counter(out, "overdue_rows_updated_total", "Строки, помеченные просроченными.",
+                 [({"table": "tasks"}, overdue["tasks_updated"]), ({"table": "projects"}, overdue["projects_updated"])])
+
+        cache = response_cache.snapshot()
+        for name in ("hits", "misses", "not_modified", "evictions", "invalidations"):
+            _counter(out, f"response_cache_{name}_total", f"Кэш ответов: {name}.", [({}, cache[name])])
+        out.append("# HELP response_cache_entries Записей в кэше ответов.")
+        out.append("# TYPE response_cache_entries gauge")
+        out.append(f"response_cache_entries {cache['entries']}")
+
+        feed = change_feed.snapshot()
+        _counter(out, "change_events_published_total", "События ленты изменений.", [({}, feed["published"])])
+        out.append("# HELP change_feed_subscribers Открытые подписки на ленту изменений (SSE и WebSocket).")
+        out.append("# TYPE change_feed_subscribers gauge")
+        out.append(f"change_feed_subscribers {feed['subscribers']}")
+        return "\n".join(out) + "\n"
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _counter(out: list, name: str, help_text: str, samples) -> None:
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} counter")
+    for labels, value in samples:
+        out.append(f"{name}{_labels(labels)} {value}")
+
+
+def _histograms(out: list, name: str, help_text: str, samples) -> None:
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} histogram")
+    for labels, histogram in samples:
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            out.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        out.append(f"{name}_sum{_labels(labels)} {round(histogram.sum, 6)}")
+        out.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: длительность, код ответа и запросы к БД каждого HTTP-запроса."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        request_scope = Scope("")
+        token = _current.set(request_scope)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.in_flight -= 1
+            _current.reset(token)
+            # шаблон маршрута, а не путь, чтобы число рядов не зависело от id
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            request_scope.label = route
+            metrics.observe_request(scope["method"], route, status, elapsed, request_scope)
+
+
+@contextmanager
+def track_job(name: str):
+    """Замер фоновой задачи: длительность, результат и её запросы к БД."""
+    job_scope = Scope(f"job:{name}")
+    token = _current.set(job_scope)
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        _current.reset(token)
+        metrics.observe_job(name, ok, time.perf_counter() - started, job_scope)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    rows = max(cursor.rowcount, 0)
+    current = _current.get()
+    if current is None:
+        metrics.observe_untracked(rows, elapsed)
+        return
+    current.queries += 1
+    current.rows += rows
+    current.db_seconds += elapsed
+
+
+def install(app) -> None:
+    """Подключает middleware, события движков и маршрут /metrics (если METRICS_ENABLED)."""
+    if not settings.METRICS_ENABLED:
+        return
+    # на классе Engine — срабатывает и для движков, пересозданных configure_database
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
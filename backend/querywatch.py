@@ -0,0 +1,210 @@
+"""Диагностика запросов к БД: N+1 и медленные запросы (QUERY_WATCH).
+
+События движков SQLAlchemy (before/after_cursor_execute) записывают каждый
+запрос текущего HTTP-запроса с нормализованным текстом (литералы и списки
+параметров заменены на ?), временем и местом вызова в коде приложения. После
+ответа QueryWatchMiddleware пишет в лог querywatch предупреждения: один и тот
+же по форме запрос выполнен QUERY_WATCH_REPEAT раз и больше (похоже на N+1) и
+запросы дольше QUERY_WATCH_SLOW_MS — с маршрутом и местом вызова.
+
+Для тестов — контекстный менеджер query_budget (фикстура с тем же именем
+объявлена в conftest.py, см. tests/test_query_budget.py):
+
+    def test_top(client, query_budget):
+        with query_budget(3, max_repeats=1):
+            client.get("/employees/top?from_date=2024-01-01&to_date=2024-12-31")
+
+Режим диагностический: обход стека на каждый запрос к БД заметно дороже, чем
+замеры metrics.py, в рабочем окружении он выключен.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from settings import settings
+
+logger = logging.getLogger("querywatch")
+
+BACKEND_DIR = Path(__file__).resolve().parent
+# кадры этого модуля и установленных библиотек не считаются местом вызова
+_SKIP_FILES = (__file__, "site-packages", "dist-packages")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROW_LIST = re.compile(r"\(\?, \.\.\.\)(?:, \(\?, \.\.\.\))+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Форма запроса: без литералов, с одним ? вместо списка параметров."""
+    shape = _SPACES.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PARAM_LIST.sub("(?, ...)", shape)
+    return _ROW_LIST.sub("(?, ...), ...", shape)
+
+
+def call_site() -> str:
+    """Ближайший кадр стека в коде приложения: «routers/tasks.py:42 in read_tasks»."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(str(BACKEND_DIR)) and not any(skip in filename for skip in _SKIP_FILES):
+            return f"{Path(filename).relative_to(BACKEND_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+@dataclass
+class Statement:
+    shape: str
+    seconds: float
+    site: str
+
+
+@dataclass
+class QueryLog:
+    """Запросы к БД одного HTTP-запроса (или блока query_budget)."""
+    label: str = ""
+    statements: list[Statement] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(statement.seconds for statement in self.statements)
+
+    def repeated(self, threshold: int) -> list[tuple[str, list[Statement]]]:
+        """Формы, выполненные threshold раз и больше, — самые частые первыми."""
+        groups = defaultdict(list)
+        for statement in self.statements:
+            groups[statement.shape].append(statement)
+        found = [(shape, group) for shape, group in groups.items() if len(group) >= threshold]
+        found.sort(key=lambda item: -len(item[1]))
+        return found
+
+    def slow(self, threshold_ms: float) -> list[Statement]:
+        return [statement for statement in self.statements if statement.seconds * 1000 >= threshold_ms]
+
+    def report(self, repeat_threshold: int, slow_ms: float) -> list[str]:
+        """Строки предупреждений: повторы и медленные запросы с местами вызова."""
+        lines = []
+        for shape, group in self.repeated(repeat_threshold):
+            sites = sorted({statement.site for statement in group})
+            lines.append(f"{self.label}: {len(group)} одинаковых запросов ({', '.join(sites)}): {shape}")
+        for statement in self.slow(slow_ms):
+            lines.append(f"{self.label}: медленный запрос {statement.seconds * 1000:.1f} мс ({statement.site}): {statement.shape}")
+        return lines
+
+
+_current: ContextVar[QueryLog | None] = ContextVar("querywatch_log", default=None)
+# журналы query_budget: собирают запросы всех потоков (TestClient выполняет приложение в своём)
+_budgets: list[QueryLog] = []
+_budgets_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._querywatch_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_querywatch_started", None)
+    if started is None:
+        return
+    current = _current.get()
+    if current is None and not _budgets:
+        return
+    record = Statement(normalize_sql(statement), time.perf_counter() - started, call_site())
+    if current is not None:
+        current.statements.append(record)
+    with _budgets_lock:
+        for log in _budgets:
+            log.statements.append(record)
+
+
+def listen() -> None:
+    # на классе Engine — срабатывает и для движков, пересозданных configure_database
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryWatchMiddleware:
+    """ASGI-middleware: журнал запросов к БД на каждый HTTP-запрос и предупреждения по нему."""
+
+    def __init__(self, app, repeat_threshold: int, slow_ms: float):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _current.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            log.label = f"{scope['method']} {route}"
+            for line in log.report(self.repeat_threshold, self.slow_ms):
+                logger.warning(line)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: int | None = None, label: str = "query_budget"):
+    """Проверяет, что в блоке не больше max_queries запросов к БД и ни одна
+    форма не повторилась больше max_repeats раз; иначе QueryBudgetExceeded."""
+    listen()
+    log = QueryLog(label)
+    with _budgets_lock:
+        _budgets.append(log)
+    try:
+        yield log
+    finally:
+        with _budgets_lock:
+            _budgets.remove(log)
+
+    problems = []
+    if len(log) > max_queries:
+        problems.append(f"{len(log)} запросов к БД при бюджете {max_queries}")
+    if max_repeats is not None:
+        for shape, group in log.repeated(max_repeats + 1):
+            sites = sorted({statement.site for statement in group})
+            problems.append(f"{len(group)} раз ({', '.join(sites)}): {shape}")
+    if problems:
+        shapes = "\n".join(f"  {statement.site}: {statement.shape}" for statement in log.statements)
+        raise QueryBudgetExceeded(f"{label}: " + "; ".join(problems) + f"\nЗапросы:\n{shapes}")
+
+
+def install(app) -> None:
+    """Подключает события движков и middleware (если QUERY_WATCH)."""
+    if not settings.QUERY_WATCH:
+        return
+    listen()
+    app.add_middleware(
+        QueryWatchMiddleware,
+        repeat_threshold=settings.QUERY_WATCH_REPEAT,
+        slow_ms=settings.QUERY_WATCH_SLOW_MS,
+    )
+
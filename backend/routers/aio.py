@@ -0,0 +1,98 @@
+"""Async-версии читающих маршрутов для режима DB_ASYNC.
+
+Обработчики не пишутся вручную: install() берёт из роутера GET-маршруты,
+которые получают сессию через Depends(get_read_db), и заменяет каждый
+async-обработчиком с той же сигнатурой, где db — AsyncSession из
+get_async_db. Исходный sync-обработчик выполняется целиком через
+AsyncSession.run_sync: SQL идёт через async-драйвер, а ORM-работа и
+сериализация ответа — синхронно в event loop (в greenlet), без пула потоков.
+
+Путь, параметры, теги кэша и описание ответа берутся у исходного маршрута,
+место маршрута в роутере не меняется. Пишущие маршруты остаются sync.
+"""
+import functools
+import inspect
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dependencies import get_async_db, get_read_db
+
+
+def _session_param(endpoint) -> str | None:
+    """Имя параметра обработчика с Depends(get_read_db) или None."""
+    for name, param in inspect.signature(endpoint).parameters.items():
+        if getattr(param.default, "dependency", None) is get_read_db:
+            return name
+    return None
+
+
+def async_endpoint(endpoint, session_param: str):
+    """async-обработчик: та же сигнатура, сессия — AsyncSession, тело — endpoint через run_sync."""
+    signature = inspect.signature(endpoint)
+
+    def call(session, kwargs):
+        result = endpoint(**kwargs, **{session_param: session})
+        # в greenlet run_sync: ленивые атрибуты ORM-объектов ещё можно догрузить
+        return result if isinstance(result, Response) else jsonable_encoder(result)
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        db: AsyncSession = kwargs.pop(session_param)
+        return await db.run_sync(call, kwargs)
+
+    wrapper.__signature__ = signature.replace(parameters=[
+        param.replace(annotation=AsyncSession, default=Depends(get_async_db)) if name == session_param else param
+        for name, param in signature.parameters.items()
+    ])
+    return wrapper
+
+
+def async_route(route: APIRoute, session_param: str) -> APIRoute:
+    """Копия маршрута с async-обработчиком (тот же класс маршрута — и тот же кэш)."""
+    return type(route)(
+        route.path,
+        async_endpoint(route.endpoint, session_param),
+        response_model=route.response_model,
+        status_code=route.status_code,
+        tags=route.tags,
+        dependencies=route.dependencies,
+        summary=route.summary,
+        description=route.description,
+        response_description=route.response_description,
+        responses=route.responses,
+        deprecated=route.deprecated,
+        name=route.name,
+        methods=route.methods,
+        operation_id=route.operation_id,
+        response_model_include=route.response_model_include,
+        response_model_exclude=route.response_model_exclude,
+        response_model_by_alias=route.response_model_by_alias,
+        response_model_exclude_unset=route.response_model_exclude_unset,
+        response_model_exclude_defaults=route.response_model_exclude_defaults,
+        response_model_exclude_none=route.response_model_exclude_none,
+        include_in_schema=route.include_in_schema,
+        response_class=route.response_class,
+        dependency_overrides_provider=route.dependency_overrides_provider,
+        callbacks=route.callbacks,
+        openapi_extra=route.openapi_extra,
+        generate_unique_id_function=route.generate_unique_id_function,
+    )
+
+
+def install(target: APIRouter) -> list[APIRoute]:
+    """Заменяет в роутере читающие sync-маршруты их async-версиями; возвращает новые маршруты.
+
+    Вызывается до app.include_router, чтобы порядок маршрутов остался прежним.
+    """
+    installed = []
+    for i, route in enumerate(target.routes):
+        if not isinstance(route, APIRoute) or route.methods != {"GET"} or inspect.iscoroutinefunction(route.endpoint):
+            continue
+        session_param = _session_param(route.endpoint)
+        if session_param is not None:
+            target.routes[i] = async_route(route, session_param)
+            installed.append(target.routes[i])
+    return installed
@@ -0,0 +1,105 @@
+"""Лента изменений (см. changes.py).
+
+    GET /changes/stream?types=task,project&ids=1,2    — SSE, возобновление по Last-Event-ID
+    WS  /changes/ws?types=task&last_event_id=...      — те же события JSON-сообщениями
+    GET /changes/?last_event_id=...                   — события из буфера одним ответом
+
+Браузерный EventSource сам передаёт Last-Event-ID при переподключении; для
+первого подключения id можно задать параметром last_event_id.
+"""
+import asyncio
+import json
+from typing import List, NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from changes import ENTITIES, RESET, change_feed, sse_message
+from dependencies import parse_id_list
+from settings import settings
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+
+class ChangeFilter(NamedTuple):
+    entities: Optional[set]
+    ids: Optional[set]
+
+
+def change_filter(types: Optional[str] = Query(None, description="task,project,employee через запятую; по умолчанию все"),
+                  ids: Optional[List[int]] = Depends(parse_id_list)) -> ChangeFilter:
+    entities = None
+    if types is not None:
+        entities = {t.strip() for t in types.split(",") if t.strip()}
+        if not entities or not entities <= set(ENTITIES):
+            raise HTTPException(status_code=422, detail=f"types must be a subset of: {', '.join(ENTITIES)}")
+    return ChangeFilter(entities, set(ids) if ids is not None else None)
+
+
+async def _follow(last_event_id: Optional[str], filters: ChangeFilter):
+    """Пропущенные события, затем новые; RESET — события потеряны, None — пора отправить heartbeat."""
+    subscription, backlog = change_feed.subscribe(last_event_id)
+    try:
+        if backlog is None:
+            yield RESET
+            backlog = []
+        for event in backlog:
+            if event.matches(*filters):
+                yield event
+        while True:
+            try:
+                event = await subscription.get(settings.CHANGES_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is RESET or event.matches(*filters):
+                yield event
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def change_stream(filters: ChangeFilter = Depends(change_filter),
+                        last_event_id: Optional[str] = Query(None),
+                        last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")):
+    async def frames():
+        # клиент переподключается через retry мс после обрыва
+        yield f"retry: {settings.CHANGES_RETRY_MS}\n\n"
+        async for event in _follow(last_event_id_header or last_event_id, filters):
+            yield ": ping\n\n" if event is None else sse_message(event)
+
+    return StreamingResponse(frames(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/ws")
+async def change_socket(websocket: WebSocket, types: Optional[str] = None, ids: str = "all",
+                        last_event_id: Optional[str] = None):
+    try:
+        filters = change_filter(types, parse_id_list(ids))
+    except HTTPException as exc:
+        await websocket.close(code=1008, reason=exc.detail)
+        return
+    await websocket.accept()
+    try:
+        async for event in _follow(last_event_id, filters):
+            if event is None:
+                message = {"type": "ping"}
+            elif event is RESET:
+                message = {"type": "reset", "last_event_id": change_feed.last_event_id}
+            else:
+                message = {"type": "change", **event.as_dict()}
+            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/")
+def recent_changes(filters: ChangeFilter = Depends(change_filter), last_event_id: Optional[str] = None):
+    """События после last_event_id (без него — весь буфер); reset — часть событий потеряна."""
+    events = change_feed.since(last_event_id) if last_event_id else change_feed.recent()
+    return {
+        "reset": events is None,
+        "last_event_id": change_feed.last_event_id,
+        "events": [event.as_dict() for event in events or [] if event.matches(*filters)],
+    }
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date
 from typing import Optional, List
 
 from TaskBase.models import Employee, Task
-from TaskBase.logic import add_employee, get_employee_score, get_employee_tasks, get_top_employees, get_employee
-from dependencies import get_db
+from TaskBase.logic import (
+    add_employee,
+    add_employees,
+    get_employee,
+    get_employee_score,
+    get_employee_score_series,
+    get_employee_scores,
+    get_employee_tasks,
+    get_top_employees,
+    list_employees,
+    EMPLOYEE_FIELDS,
+    task_to_dict,
+)
+from bulk import atomic_param, batch_body, bulk_response, validate_batch
+from cache import CachedRoute, cached, invalidates
+from changes import change_feed
+from settings import settings
+from dependencies import Page, SeriesPeriod, field_list, get_db, get_read_db, page_params, parse_id_list, series_period
 
-router = APIRouter(prefix="/employees", tags=["Employees"])
+router = APIRouter(prefix="/employees", tags=["Employees"], route_class=CachedRoute)
 
 class EmployeeCreate(BaseModel):
     name: str
@@ -24,45 +41,87 @@ class EmployeeUpdate(BaseModel):
     status_end: Optional[date] = None
 
 @router.get("/")
-def get_employees(db: Session = Depends(get_db)):
-    return db.query(Employee).order_by(Employee.name).all()
+@cached("employees")
+def get_employees(fields: Optional[List[str]] = Depends(field_list(EMPLOYEE_FIELDS)), page: Page = Depends(page_params), db: Session = Depends(get_read_db)):
+    return list_employees(db, fields=fields, limit=page.limit, cursor=page.cursor)
 
 @router.get("/top")
-def top_employees(from_date: date, to_date: date, n: int = 3, db: Session = Depends(get_db)):
+@cached("employees", "scores")
+def top_employees(from_date: date, to_date: date, n: int = 3, db: Session = Depends(get_read_db)):
     top = get_top_employees(db, from_date, to_date, top_n=n)
     return top
 
+@router.get("/scores")
+@cached("employees", "scores")
+def employee_scores(from_date: date, to_date: date, ids: Optional[List[int]] = Depends(parse_id_list), db: Session = Depends(get_read_db)):
+    scores = get_employee_scores(db, ids, from_date, to_date)
+    return [{"employee_id": employee_id, "score": score} for employee_id, score in scores.items()]
+
 @router.get("/search")
-def search_employees(query: str, db: Session = Depends(get_db)):
-    results = db.query(Employee).filter(Employee.name.ilike(f"%{query}%")).all()
-    return results
+@cached("employees")
+def search_employees(query: str, limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_SIZE_MAX), db: Session = Depends(get_read_db)):
+    q = db.query(Employee).filter(Employee.name.ilike(f"%{query}%"))
+    if limit is not None:
+        q = q.order_by(Employee.name, Employee.id).limit(limit)
+    return q.all()
 
 @router.post("/")
+@invalidates("employees")
 def create_employee(data: EmployeeCreate, db: Session = Depends(get_db)):
     employee = add_employee(db, data.name, data.position, data.date_started)
+    # id из identity map — без лишнего SELECT после commit
+    change_feed.publish("employee", "created", inspect(employee).identity, data.model_dump())
     return employee
 
+@router.post("/bulk")
+@invalidates("employees")
+def create_employees_bulk(items: List[dict] = Depends(batch_body), atomic: bool = Depends(atomic_param), db: Session = Depends(get_db)):
+    valid, errors = validate_batch(EmployeeCreate, items)
+    if atomic and errors:
+        valid = {}
+
+    indexes = list(valid)
+    ids = add_employees(db, [
+        {"name": valid[i].name, "position": valid[i].position, "start_date": valid[i].date_started}
+        for i in indexes
+    ])
+    if ids:
+        change_feed.publish("employee", "created", ids)
+    applied = {i: {"status": "created", "id": employee_id} for i, employee_id in zip(indexes, ids)}
+    return bulk_response(len(items), applied, errors)
+
 @router.put("/{employee_id}")
+@invalidates("employee:{employee_id}", "employees")
 def update_employee(employee_id: int, data: EmployeeUpdate, db: Session = Depends(get_db)):
     emp = db.query(Employee).filter(Employee.id == employee_id).first()
     if not emp:
         raise HTTPException(status_code=404, detail="Employee not found")
-    for field, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(emp, field, value)
     db.commit()
+    change_feed.publish("employee", "updated", [employee_id], changes)
     return {"status": "updated"}
 
 @router.get("/{employee_id}")
-def get_emp(employee_id: int, db: Session = Depends(get_db)):
+@cached("employee:{employee_id}")
+def get_emp(employee_id: int, db: Session = Depends(get_read_db)):
     emp = get_employee(db, employee_id)
     return emp
 
 @router.get("/{employee_id}/score")
-def employee_score(employee_id: int, from_date: date, to_date: date, db: Session = Depends(get_db)):
+@cached("scores")
+def employee_score(employee_id: int, from_date: date, to_date: date, db: Session = Depends(get_read_db)):
     score = get_employee_score(db, employee_id, from_date, to_date)
     return {"score": score}
 
+@router.get("/{employee_id}/score_series")
+@cached("scores")
+def employee_score_series(employee_id: int, period: SeriesPeriod = Depends(series_period), db: Session = Depends(get_read_db)):
+    return get_employee_score_series(db, employee_id, *period)
+
 @router.get("/{employee_id}/tasks")
-def employee_tasks(employee_id: int, from_date: date, to_date: date, db: Session = Depends(get_db)):
+@cached("tasks")
+def employee_tasks(employee_id: int, from_date: date, to_date: date, db: Session = Depends(get_read_db)):
     tasks = get_employee_tasks(db, employee_id, from_date, to_date)
-    return tasks
\ No newline at end of file
+    return [task_to_dict(t) for t in tasks]
\ No newline at end of file
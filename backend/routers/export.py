@@ -0,0 +1,110 @@
+"""Потоковая выгрузка задач, проектов и баллов в CSV или NDJSON.
+
+Строки читаются с курсора пачками по EXPORT_BATCH_SIZE (yield_per) и сразу
+отправляются клиенту, так что память не зависит от объёма выгрузки. Сессия
+открывается внутри генератора и живёт, пока идёт ответ.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from TaskBase.logic import (
+    PROJECT_FIELDS,
+    TASK_FIELDS,
+    filtered_projects_query,
+    get_read_session,
+    score_export_query,
+    task_to_dict,
+    tasks_in_period_query,
+)
+from TaskBase.models import Project, Task
+from TaskBase.pagination import to_fields
+from settings import settings
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+ExportFormat = Literal["csv", "ndjson"]
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+SCORE_FIELDS = ("id", "name", "period_start", "score")
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ",".join(str(v) for v in value)
+    return "" if value is None else value
+
+
+def _encode(rows, fields, fmt: ExportFormat):
+    """Кодирует словари в CSV (с заголовком) или NDJSON кусками по EXPORT_BATCH_SIZE строк."""
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        # BOM — чтобы Excel открывал кириллицу в UTF-8
+        buffer.write("\ufeff")
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+    for i, row in enumerate(rows, start=1):
+        if writer is not None:
+            writer.writerow([_csv_value(row[f]) for f in fields])
+        else:
+            buffer.write(json.dumps(row, ensure_ascii=False, default=str))
+            buffer.write("\n")
+        if i % settings.EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _stream(build_rows, fields, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    def generate():
+        session = get_read_session()
+        try:
+            yield from _encode(build_rows(session), fields, fmt)
+        finally:
+            session.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@router.get("/tasks")
+def export_tasks(from_date: Optional[date] = None, to_date: Optional[date] = None, query: Optional[str] = None, status: Optional[str] = None,
+                 unlinked_only: bool = False, format: ExportFormat = "csv"):
+    def rows(session):
+        q = tasks_in_period_query(session, from_date, to_date, query, status, unlinked_only=unlinked_only)
+        for task in q.order_by(Task.id).yield_per(settings.EXPORT_BATCH_SIZE):
+            yield task_to_dict(task)
+
+    return _stream(rows, TASK_FIELDS, format, "tasks")
+
+
+@router.get("/projects")
+def export_projects(from_date: Optional[date] = None, to_date: Optional[date] = None, query: Optional[str] = None, status: Optional[str] = None,
+                    format: ExportFormat = "csv"):
+    def rows(session):
+        q = filtered_projects_query(session, from_date, to_date, query, status)
+        for project in q.order_by(None).order_by(Project.id).yield_per(settings.EXPORT_BATCH_SIZE):
+            yield to_fields(project, PROJECT_FIELDS)
+
+    return _stream(rows, PROJECT_FIELDS, format, "projects")
+
+
+@router.get("/scores")
+def export_scores(from_date: date, to_date: date, entity: Literal["employees", "projects"] = "employees",
+                  granularity: Literal["day", "week", "month", "quarter"] = "day", format: ExportFormat = "csv"):
+    def rows(session):
+        q = score_export_query(session, entity, from_date, to_date, granularity)
+        for row in q.yield_per(settings.EXPORT_BATCH_SIZE):
+            yield dict(zip(SCORE_FIELDS, row))
+
+    return _stream(rows, SCORE_FIELDS, format, f"{entity}_scores")
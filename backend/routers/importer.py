@@ -0,0 +1,54 @@
+"""Импорт исторических задач (см. TaskBase.importer).
+
+Файл передаётся телом запроса как есть, без multipart:
+
+    curl --data-binary @tasks.csv "http://localhost:8000/import/tasks?format=csv"
+
+Тело — UTF-8; JSON-массив, как и CSV/NDJSON, читается по одной записи.
+Если тело не удаётся прочитать с самого начала (не UTF-8, не JSON-массив),
+ответ — 422; если чтение оборвалось позже, уже импортированные пачки
+остаются, а причина возвращается в поле error отчёта.
+"""
+import io
+import tempfile
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+
+from TaskBase.importer import import_tasks, read_rows
+from TaskBase.logic import get_session
+from cache import CachedRoute, invalidates
+from changes import change_feed
+from settings import settings
+
+router = APIRouter(prefix="/import", tags=["Import"], route_class=CachedRoute)
+
+
+def _run_import(spool, fmt: str, chunk_size: int, dry_run: bool) -> dict:
+    stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+    with get_session() as session:
+        report = import_tasks(session, read_rows(stream, fmt), chunk_size, dry_run)
+    return report.as_dict()
+
+
+@router.post("/tasks")
+@invalidates("tasks", "projects", "scores")
+async def import_tasks_file(request: Request,
+                            format: Literal["csv", "ndjson", "json"] = Query(..., description="Формат тела запроса"),
+                            chunk_size: int = Query(1000, ge=1, le=settings.BULK_MAX_ITEMS * 10),
+                            dry_run: bool = False):
+    # тело сбрасывается во временный файл (большие — на диск), импорт идёт потоково из него
+    with tempfile.SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MAX_MEMORY) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        report = await run_in_threadpool(_run_import, spool, format, chunk_size, dry_run)
+    if report["error"] and not report["rows"]:
+        raise HTTPException(status_code=422, detail=report["error"])
+    # id импортированных строк не собираются: пустой ids — перечитать список целиком
+    if not dry_run and report["imported"]:
+        change_feed.publish("task", "imported", data={"imported": report["imported"]})
+    if not dry_run and report["projects_created"]:
+        change_feed.publish("project", "imported", data={"created": report["projects_created"]})
+    return report
@@ -1,22 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from datetime import date
-from typing import Optional
-from dependencies import require_delete_password
+from typing import List, Optional
+from cache import CachedRoute, cached, invalidates
+from changes import change_feed
+from dependencies import Page, SeriesPeriod, field_list, page_params, require_delete_password, parse_id_list, series_period
 
 from TaskBase.logic import (
     add_project_with_stages,
-    get_filtered_projects,
+    list_projects,
+    PROJECT_FIELDS,
     get_project_score,
+    get_project_score_series,
+    get_project_scores,
     get_project_name,
+    get_project_full,
+    get_projects_full,
     get_project_stages,
     get_stage_tasks,
+    delete_task,
+    task_to_dict,
 )
 from TaskBase.models import Project, Task
-from dependencies import get_db
+from dependencies import get_db, get_read_db
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(prefix="/projects", tags=["Projects"], route_class=CachedRoute)
 
 
 class ProjectCreate(BaseModel):
@@ -35,59 +45,110 @@ class ProjectUpdate(BaseModel):
 
 
 @router.get("/")
-def get_projects(from_date: Optional[date] = None, to_date: Optional[date] = None, query: Optional[str] = None, status: Optional[str] = None, db: Session = Depends(get_db)):
-    return get_filtered_projects(db,
-                                 from_date=from_date,
-                                 to_date=to_date,
-                                 query=query,
-                                 status=status)
+@cached("projects")
+def get_projects(from_date: Optional[date] = None, to_date: Optional[date] = None, query: Optional[str] = None, status: Optional[str] = None,
+                 fields: Optional[List[str]] = Depends(field_list(PROJECT_FIELDS)), page: Page = Depends(page_params), db: Session = Depends(get_read_db)):
+    return list_projects(db,
+                         from_date=from_date,
+                         to_date=to_date,
+                         query=query,
+                         status=status,
+                         fields=fields,
+                         limit=page.limit,
+                         cursor=page.cursor)
+
+
+@router.get("/scores")
+@cached("projects", "scores")
+def project_scores(from_date: date, to_date: date, ids: Optional[List[int]] = Depends(parse_id_list), db: Session = Depends(get_read_db)):
+    scores = get_project_scores(db, ids, from_date, to_date)
+    return [{"project_id": project_id, "score": score} for project_id, score in scores.items()]
+
+
+@router.get("/full")
+@cached("projects", "tasks", "scores", "employees")
+def projects_full(ids: Optional[List[int]] = Depends(parse_id_list), from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_read_db)):
+    return get_projects_full(db, ids, from_date, to_date)
 
 
 @router.post("/")
+@invalidates("projects")
 def create_project(data: ProjectCreate, db: Session = Depends(get_db)):
-    return add_project_with_stages(db, data.name, data.description, data.deadline)
+    project = add_project_with_stages(db, data.name, data.description, data.deadline)
+    # id из identity map — без лишнего SELECT после commit
+    change_feed.publish("project", "created", inspect(project).identity, data.model_dump())
+    return project
 
 
 @router.put("/{project_id}")
+@invalidates("project:{project_id}", "projects")
 def update_project(project_id: int, data: ProjectUpdate, db: Session = Depends(get_db)):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    for field, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(project, field, value)
     db.commit()
+    change_feed.publish("project", "updated", [project_id], changes)
     return {"status": "updated"}
 
 
 @router.get("/{project_id}/name")
-def project_name(project_id: int, db: Session = Depends(get_db)):
+@cached("project:{project_id}")
+def project_name(project_id: int, db: Session = Depends(get_read_db)):
     return {"name": get_project_name(db, project_id)}
 
 
 @router.get("/{project_id}/score")
-def project_score(project_id: int, from_date: date, to_date: date, db: Session = Depends(get_db)):
+@cached("scores")
+def project_score(project_id: int, from_date: date, to_date: date, db: Session = Depends(get_read_db)):
     return {"score": get_project_score(db, project_id, from_date, to_date)}
 
 
+@router.get("/{project_id}/score_series")
+@cached("scores")
+def project_score_series(project_id: int, period: SeriesPeriod = Depends(series_period), db: Session = Depends(get_read_db)):
+    return get_project_score_series(db, project_id, *period)
+
+
+@router.get("/{project_id}/full")
+@cached("project:{project_id}", "tasks", "scores", "employees")
+def project_full(project_id: int, from_date: Optional[date] = None, to_date: Optional[date] = None, db: Session = Depends(get_read_db)):
+    project = get_project_full(db, project_id, from_date, to_date)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+
 @router.get("/{project_id}/stages")
-def api_get_project_stages(project_id: int, db: Session = Depends(get_db)):
+@cached("project:{project_id}")
+def api_get_project_stages(project_id: int, db: Session = Depends(get_read_db)):
     return get_project_stages(db, project_id)
 
 
 @router.get("/{project_id}/{stage_id}/tasks")
-def api_get_stage_tasks(project_id: int, stage_id: int, db: Session = Depends(get_db)):
-    return get_stage_tasks(db, project_id, stage_id)
+@cached("tasks")
+def api_get_stage_tasks(project_id: int, stage_id: int, db: Session = Depends(get_read_db)):
+    return [task_to_dict(t) for t in get_stage_tasks(db, project_id, stage_id)]
 
 
 @router.delete("/{project_id}", dependencies=[Depends(require_delete_password)])
+@invalidates("project:{project_id}", "projects", "tasks", "scores")
 def delete_project(project_id: int, db: Session = Depends(get_db)):
     proj = db.query(Project).get(project_id)
     if not proj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    # если нет каскада в БД — удалим задачи вручную
-    db.query(Task).filter(Task.project_id == project_id).delete(synchronize_session=False)
+    # если нет каскада в БД — удалим задачи вручную (вместе с исполнителями и баллами в леджере)
+    task_ids = []
+    for task in db.query(Task).filter(Task.project_id == project_id).all():
+        task_ids.append(task.id)
+        delete_task(db, task)
 
     db.delete(proj)
     db.commit()
+    if task_ids:
+        change_feed.publish("task", "deleted", task_ids)
+    change_feed.publish("project", "deleted", [project_id])
     return {"status": "deleted", "id": project_id}
\ No newline at end of file
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from TaskBase.search import SEARCH_KINDS, search
+from cache import CachedRoute, cached
+from dependencies import get_read_db
+
+router = APIRouter(prefix="/search", tags=["Search"], route_class=CachedRoute)
+
+@router.get("/")
+@cached("employees", "projects", "tasks")
+def search_all(q: str = Query(..., min_length=1, description="Слова ищутся по началу, регистр не важен"),
+               types: Optional[str] = Query(None, description="employee,project,task через запятую; по умолчанию все"),
+               limit: int = Query(20, ge=1, le=100),
+               db: Session = Depends(get_read_db)):
+    kinds = None
+    if types is not None:
+        kinds = list(dict.fromkeys(t.strip() for t in types.split(",") if t.strip()))
+        if not kinds or any(kind not in SEARCH_KINDS for kind in kinds):
+            raise HTTPException(status_code=422, detail=f"types must be a subset of: {', '.join(SEARCH_KINDS)}")
+    return search(db, q, kinds, limit)
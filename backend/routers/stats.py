@@ -1,20 +1,55 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
 from datetime import date
-from typing import List
+from typing import Dict, List, Literal
 
 from TaskBase import DEPARTMENT_NAME
-from TaskBase.logic import get_department_score
+from TaskBase.logic import get_department_score, get_department_score_series, overdue_stats
 from TaskBase.models import Task, Project
-from dependencies import get_db
+from TaskBase.scoring import ScoreRules, simulate_period
+from cache import CachedRoute, cached, response_cache
+from dependencies import SeriesPeriod, get_read_db, series_period
 
-router = APIRouter(prefix="/stats", tags=["Statistics"])
+router = APIRouter(prefix="/stats", tags=["Statistics"], route_class=CachedRoute)
+
+class WhatIfRequest(BaseModel):
+    from_date: date
+    to_date: date
+    # баллы за сложность, например {"1": 1, "2": 3, "4": 6}; не указанные — как сейчас
+    difficulty_weights: Dict[int, int] = {}
+    lateness: Literal["proportional", "zero", "ignore"] = "proportional"
+    grace_days: int = Field(0, ge=0)
+    top: int = Field(10, ge=1, le=1000)
 
 @router.get("/department_name")
+@cached("department")
 def department_name():
     return {"name": DEPARTMENT_NAME}
 
 @router.get("/department_score")
-def department_score(from_date: date, to_date: date, db: Session = Depends(get_db)):
+@cached("employees", "scores")
+def department_score(from_date: date, to_date: date, db: Session = Depends(get_read_db)):
     score = get_department_score(db, from_date, to_date)
-    return {"score": score}
\ No newline at end of file
+    return {"score": score}
+
+@router.get("/department_series")
+@cached("employees", "scores")
+def department_series(period: SeriesPeriod = Depends(series_period), db: Session = Depends(get_read_db)):
+    return get_department_score_series(db, *period)
+
+@router.get("/cache")
+def cache_stats():
+    return response_cache.snapshot()
+
+@router.get("/overdue")
+def overdue_job_stats():
+    return overdue_stats.snapshot()
+
+@router.post("/what_if")
+def what_if(body: WhatIfRequest, db: Session = Depends(get_read_db)):
+    """Баллы за период при других правилах начисления; БД не меняется."""
+    if body.from_date > body.to_date:
+        raise HTTPException(status_code=422, detail="from_date must not be after to_date")
+    rules = ScoreRules(body.difficulty_weights, body.lateness, body.grace_days)
+    return simulate_period(db, body.from_date, body.to_date, rules, top=body.top)
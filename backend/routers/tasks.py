@@ -3,13 +3,28 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from datetime import date
 from typing import List, Optional
-from dependencies import require_delete_password
+from bulk import atomic_param, batch_body, bulk_response, validate_batch
+from cache import CachedRoute, cached, invalidates, response_cache
+from changes import change_feed
+from dependencies import Page, field_list, page_params, require_delete_password
 
 from TaskBase.models import Task
-from TaskBase.logic import add_task, calculate_task_score, filter_tasks_in_period
-from dependencies import get_db
+from TaskBase.logic import (
+    add_task,
+    add_tasks,
+    check_task_references,
+    existing_task_ids,
+    update_tasks,
+    apply_score_delta,
+    calculate_task_score,
+    delete_task as remove_task,
+    list_tasks,
+    snapshot_task_score,
+    TASK_FIELDS,
+)
+from dependencies import get_db, get_read_db
 
-router = APIRouter(prefix="/tasks", tags=["Tasks"])
+router = APIRouter(prefix="/tasks", tags=["Tasks"], route_class=CachedRoute)
 
 class TaskCreate(BaseModel):
     name: str
@@ -30,17 +45,26 @@ class TaskUpdate(BaseModel):
     completed_date: Optional[date] = None
     executor_ids: Optional[List[int]] = None
 
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
 @router.get("/")
-def tasks_in_period(from_date: Optional[date] = None, to_date: Optional[date] = None, query: Optional[str] = None, status: Optional[str] = None, db: Session = Depends(get_db)):
-    tasks = filter_tasks_in_period(db,
-                                   from_date=from_date,
-                                   to_date=to_date,
-                                   query=query,
-                                   status=status)
-    unlinked = [t for t in tasks if t.project_id is None]
-    return unlinked
+@cached("tasks")
+def tasks_in_period(from_date: Optional[date] = None, to_date: Optional[date] = None, query: Optional[str] = None, status: Optional[str] = None,
+                    fields: Optional[List[str]] = Depends(field_list(TASK_FIELDS)), page: Page = Depends(page_params), db: Session = Depends(get_read_db)):
+    # только задачи вне проектов
+    return list_tasks(db,
+                      from_date=from_date,
+                      to_date=to_date,
+                      query=query,
+                      status=status,
+                      unlinked_only=True,
+                      fields=fields,
+                      limit=page.limit,
+                      cursor=page.cursor)
 
 @router.post("/")
+@invalidates("tasks")
 def create_task(data: TaskCreate, db: Session = Depends(get_db)):
     task = add_task(
         db,
@@ -52,25 +76,82 @@ def create_task(data: TaskCreate, db: Session = Depends(get_db)):
         project_id=data.project_id,
         stage_id=data.stage_id
     )
+    change_feed.publish("task", "created", [task.id], data.model_dump())
     return {"id": task.id, "name": task.name}
 
+@router.post("/bulk")
+@invalidates("tasks")
+def create_tasks_bulk(items: List[dict] = Depends(batch_body), atomic: bool = Depends(atomic_param), db: Session = Depends(get_db)):
+    valid, errors = validate_batch(TaskCreate, items)
+    _check_references(db, valid, errors)
+    if atomic and errors:
+        valid = {}
+
+    indexes = list(valid)
+    ids = add_tasks(db, [valid[i].model_dump() for i in indexes])
+    if ids:
+        change_feed.publish("task", "created", ids)
+    applied = {i: {"status": "created", "id": task_id} for i, task_id in zip(indexes, ids)}
+    return bulk_response(len(items), applied, errors)
+
+@router.patch("/bulk")
+@invalidates("tasks", "scores")
+def update_tasks_bulk(items: List[dict] = Depends(batch_body), atomic: bool = Depends(atomic_param), db: Session = Depends(get_db)):
+    valid, errors = validate_batch(TaskBulkUpdate, items)
+    _check_references(db, valid, errors)
+
+    existing = existing_task_ids(db, {data.id for data in valid.values()})
+    seen = set()
+    for i, data in list(valid.items()):
+        if data.id not in existing:
+            errors[i] = [{"msg": "Task not found"}]
+        elif data.id in seen:
+            errors[i] = [{"msg": f"task {data.id} occurs more than once in the batch"}]
+        seen.add(data.id)
+        if i in errors:
+            del valid[i]
+    if atomic and errors:
+        valid = {}
+
+    update_tasks(db, {data.id: data.model_dump(exclude_unset=True, exclude={"id"}) for data in valid.values()})
+    # баллы отдельных задач закэшированы под тегами task:{id}
+    response_cache.invalidate(*(f"task:{data.id}" for data in valid.values()))
+    if valid:
+        change_feed.publish("task", "updated", [data.id for data in valid.values()])
+    applied = {i: {"status": "updated", "id": data.id} for i, data in valid.items()}
+    return bulk_response(len(items), applied, errors)
+
+def _check_references(db: Session, valid: dict, errors: dict) -> None:
+    """Переносит из valid в errors элементы с несуществующими исполнителями/проектом/этапом."""
+    indexes = list(valid)
+    problems = check_task_references(db, [valid[i].model_dump(exclude_unset=True) for i in indexes])
+    for position, messages in problems.items():
+        index = indexes[position]
+        errors[index] = [{"msg": message} for message in messages]
+        del valid[index]
+
 @router.put("/{task_id}")
+@invalidates("task:{task_id}", "tasks", "scores")
 def update_task(task_id: int, data: TaskUpdate, db: Session = Depends(get_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    for field, value in data.dict(exclude_unset=True).items():
-        # если поле executor_ids — преобразуем список в строку
-        if field == "executor_ids" and isinstance(value, list):
-            value = ",".join(str(i) for i in value)
+    before = snapshot_task_score(task)
+    changes = data.dict(exclude_unset=True)
+    for field, value in changes.items():
+        # executor_ids раскладывается в task_executors свойством модели
         setattr(task, field, value)
 
+    # леджер баллов обновляется в той же транзакции
+    apply_score_delta(db, before, snapshot_task_score(task))
     db.commit()
+    change_feed.publish("task", "updated", [task_id], changes)
     return {"status": "updated"}
 
 @router.get("/{task_id}/score")
-def task_score(task_id: int, db: Session = Depends(get_db)):
+@cached("task:{task_id}")
+def task_score(task_id: int, db: Session = Depends(get_read_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -78,10 +159,12 @@ def task_score(task_id: int, db: Session = Depends(get_db)):
     return {"score": score}
 
 @router.delete("/{task_id}", dependencies=[Depends(require_delete_password)])
+@invalidates("task:{task_id}", "tasks", "scores")
 def delete_task(task_id: int, db: Session = Depends(get_db)):
     task = db.query(Task).get(task_id)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    db.delete(task)
+    remove_task(db, task)
     db.commit()
+    change_feed.publish("task", "deleted", [task_id])
     return {"status": "deleted", "id": task_id}
\ No newline at end of file
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -11,6 +12,74 @@ class Settings(BaseSettings):
     # абсолютный путь в контейнере: /db/database.db
     DATABASE_URL: str = "sqlite:////db/database.db"
 
+    # профиль SQLite, применяется PRAGMA на каждом новом соединении
+    SQLITE_TUNING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # отрицательное значение — в КиБ
+
+    # пул соединений
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+
+    # отдельный движок только для чтения, его используют GET-маршруты;
+    # DATABASE_READ_URL — реплика, без неё для SQLite открывается тот же файл с query_only
+    DB_READ_ENGINE: bool = False
+    DATABASE_READ_URL: Optional[str] = None
+
+    # async-режим: GET-маршруты из routers/aio.py на движке SQLAlchemy asyncio
+    # (aiosqlite / asyncpg); ASYNC_DATABASE_URL по умолчанию выводится из DATABASE_URL
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # кэш ответов читающих маршрутов (cache.py)
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: float = 60
+    CACHE_MAX_ENTRIES: int = 1024
+
+    # keyset-пагинация списков: limit по умолчанию при переданном cursor и верхняя граница limit
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+
+    # score_series / department_series: больше интервалов за запрос — 422
+    SCORE_SERIES_MAX_BUCKETS: int = 520
+
+    # максимальный размер пакета для /tasks/bulk и /employees/bulk
+    BULK_MAX_ITEMS: int = 1000
+
+    # экспорт (/export/*): строк на одну выборку с курсора и на один отправляемый кусок ответа
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # импорт (/import/tasks): тело запроса держится в памяти до этого размера, дальше — во временном файле
+    IMPORT_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024
+
+    # статус «просрочено» вычисляется при чтении по дедлайну, плановый пересчёт не нужен
+    STATUS_ON_READ: bool = False
+
+    # пересчёт просроченных задач и проектов (без STATUS_ON_READ): период (минуты) и строк на одну транзакцию
+    OVERDUE_INTERVAL_MINUTES: int = Field(5, ge=1)
+    OVERDUE_BATCH_SIZE: int = Field(500, ge=1)
+
+    # /metrics в формате Prometheus: задержки маршрутов, запросы к БД, фоновые задачи
+    METRICS_ENABLED: bool = True
+
+    # диагностика запросов к БД (querywatch.py): в лог пишутся одинаковые запросы, повторённые
+    # за один HTTP-запрос QUERY_WATCH_REPEAT раз и больше (N+1), и запросы дольше QUERY_WATCH_SLOW_MS
+    QUERY_WATCH: bool = False
+    QUERY_WATCH_REPEAT: int = Field(5, ge=2)
+    QUERY_WATCH_SLOW_MS: float = Field(100, ge=0)
+
+    # лента изменений /changes (changes.py): событий в буфере для возобновления по Last-Event-ID,
+    # период heartbeat-комментариев SSE и задержка переподключения клиента
+    CHANGES_BUFFER_SIZE: int = Field(1000, ge=1)
+    CHANGES_HEARTBEAT_SECONDS: float = Field(15, gt=0)
+    CHANGES_RETRY_MS: int = Field(3000, ge=0)
+
     # .env опционально, переменные из docker-compose перекроют .env
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -19,4 +88,24 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
+    def sqlite_pragmas(self) -> dict:
+        if not self.SQLITE_TUNING:
+            return {}
+        return {
+            "journal_mode": self.SQLITE_JOURNAL_MODE,
+            "synchronous": self.SQLITE_SYNCHRONOUS,
+            "busy_timeout": self.SQLITE_BUSY_TIMEOUT_MS,
+            "mmap_size": self.SQLITE_MMAP_SIZE,
+            "cache_size": self.SQLITE_CACHE_SIZE,
+        }
+
+    def pool_options(self) -> dict:
+        return {
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+        }
+
 settings = Settings()
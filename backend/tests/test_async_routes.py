@@ -0,0 +1,69 @@
+"""Режим DB_ASYNC: async-маршруты совпадают с sync по OpenAPI и по ответам."""
+import asyncio
+import inspect
+from datetime import date, timedelta
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from routers import aio, employees, projects, stats, tasks
+from TaskBase.aio import configure_async_database, dispose_async_database
+from TaskBase.logic import add_employees, add_project_with_stages, add_tasks, get_project_stages, update_tasks
+from TaskBase.models import get_engine
+
+ROUTERS = (employees.router, projects.router, tasks.router, stats.router)
+
+
+def build_app(async_mode: bool) -> tuple[FastAPI, list]:
+    app, installed = FastAPI(), []
+    for source in ROUTERS:
+        # копия роутера: install() меняет список маршрутов на месте
+        router = APIRouter(routes=list(source.routes))
+        if async_mode:
+            installed += aio.install(router)
+        app.include_router(router)
+    return app, installed
+
+
+def test_openapi_matches():
+    sync_app, _ = build_app(async_mode=False)
+    async_app, installed = build_app(async_mode=True)
+    assert installed and all(inspect.iscoroutinefunction(route.endpoint) for route in installed)
+    assert async_app.openapi() == sync_app.openapi()
+
+
+@pytest.fixture
+def async_db(session):
+    configure_async_database(get_engine().url.render_as_string(hide_password=False))
+    yield
+    asyncio.run(dispose_async_database())
+
+
+def test_responses_match(session, async_db):
+    today = date.today()
+    employee_ids = add_employees(session, [
+        {"name": f"Сотрудник {i}", "position": "инженер", "start_date": today - timedelta(days=100)} for i in range(3)
+    ])
+    project = add_project_with_stages(session, "Проект", "", today + timedelta(days=30))
+    stage = get_project_stages(session, project.id)[0]
+    task_ids = add_tasks(session, [
+        {"name": f"Задача {i}", "description": "", "deadline": today + timedelta(days=i), "difficulty": 2,
+         "executor_ids": employee_ids[:i + 1], "project_id": project.id, "stage_id": stage.id}
+        for i in range(3)
+    ])
+    update_tasks(session, {task_ids[0]: {"status": "выполнено"}})
+
+    period = f"from_date={today - timedelta(days=30)}&to_date={today}"
+    paths = [
+        "/employees/", f"/employees/top?{period}", f"/employees/scores?{period}", f"/employees/{employee_ids[0]}",
+        f"/employees/{employee_ids[0]}/tasks?{period}", f"/employees/{employee_ids[0]}/score_series?{period}",
+        f"/projects/?{period}", f"/projects/{project.id}/full", "/projects/999/full",
+        f"/projects/{project.id}/{stage.id}/tasks", f"/tasks/?{period}", f"/tasks/{task_ids[0]}/score",
+        f"/stats/department_score?{period}",
+    ]
+    sync_client = TestClient(build_app(async_mode=False)[0])
+    async_client = TestClient(build_app(async_mode=True)[0])
+    for path in paths:
+        expected, actual = sync_client.get(path), async_client.get(path)
+        assert (actual.status_code, actual.json()) == (expected.status_code, expected.json()), path
@@ -0,0 +1,33 @@
+"""PATCH /tasks/bulk: повторное закрытие задачи не сдвигает её дату и баллы."""
+from datetime import date, timedelta
+
+from TaskBase.logic import add_employees, add_tasks
+from TaskBase.models import EmployeeScore, Task
+
+
+def _ledger(session):
+    session.expire_all()
+    return sorted(session.query(EmployeeScore.employee_id, EmployeeScore.day, EmployeeScore.score).all())
+
+
+def test_bulk_reclose_keeps_ledger(client, session):
+    today = date.today()
+    employee_ids = add_employees(session, [{"name": "Сотрудник", "position": "инженер", "start_date": today}])
+    task_ids = add_tasks(session, [
+        {"name": f"Задача {i}", "description": "", "deadline": today + timedelta(days=5),
+         "difficulty": 2, "executor_ids": employee_ids}
+        for i in range(2)
+    ])
+    closed = today - timedelta(days=3)
+    response = client.patch("/tasks/bulk", json=[
+        {"id": task_ids[0], "status": "выполнено", "completed_date": closed.isoformat()},
+        {"id": task_ids[1], "status": "выполнено"},
+    ])
+    assert response.status_code == 200
+    ledger = _ledger(session)
+    assert {day for _, day, _ in ledger} == {closed, today}
+
+    response = client.patch("/tasks/bulk", json=[{"id": task_id, "status": "выполнено"} for task_id in task_ids])
+    assert response.status_code == 200
+    assert _ledger(session) == ledger
+    assert session.get(Task, task_ids[0]).completed_date == closed
@@ -0,0 +1,60 @@
+"""Число запросов к БД у сводных эндпоинтов не растёт с числом строк (без N+1)."""
+from datetime import date, timedelta
+
+import pytest
+
+from TaskBase.logic import add_employees, add_project_with_stages, add_tasks, get_project_stages, update_tasks
+
+
+@pytest.fixture
+def dataset(client, session):
+    """Несколько сотрудников и проектов, задачи на этапах, часть из них выполнена."""
+    today = date.today()
+    employee_ids = add_employees(session, [
+        {"name": f"Сотрудник {i}", "position": "инженер", "start_date": today - timedelta(days=400)}
+        for i in range(6)
+    ])
+    project_ids = []
+    items = []
+    for p in range(3):
+        project = add_project_with_stages(session, f"Проект {p}", "", today + timedelta(days=90))
+        project_ids.append(project.id)
+        for s, stage in enumerate(get_project_stages(session, project.id)[:3]):
+            items.append({
+                "name": f"Задача {p}.{s}",
+                "description": "",
+                "deadline": today + timedelta(days=10),
+                "difficulty": 1 + s % 2,
+                "executor_ids": employee_ids[s:s + 2],
+                "project_id": project.id,
+                "stage_id": stage.id,
+            })
+    task_ids = add_tasks(session, items)
+    update_tasks(session, {task_id: {"status": "выполнено"} for task_id in task_ids[::2]})
+    return {"employees": employee_ids, "projects": project_ids}
+
+
+def test_top_employees_budget(client, dataset, query_budget):
+    period = {"from_date": date.today() - timedelta(days=30), "to_date": date.today()}
+    # сотрудники и баллы из леджера — по запросу на всех
+    with query_budget(2, max_repeats=1):
+        response = client.get("/employees/top", params={**period, "n": 6})
+    assert response.status_code == 200
+    top = response.json()
+    assert len(top) == 6 and top[0]["score"] > 0
+
+
+def test_project_full_budget(client, dataset, query_budget):
+    project_id = dataset["projects"][0]
+    # проекты, этапы, задачи, исполнители с сотрудниками, баллы — по запросу на уровень
+    with query_budget(5, max_repeats=1):
+        response = client.get(f"/projects/{project_id}/full")
+    assert response.status_code == 200
+    assert sum(len(stage["tasks"]) for stage in response.json()["stages"]) == 3
+
+
+def test_projects_full_budget(client, dataset, query_budget):
+    with query_budget(5, max_repeats=1):
+        response = client.get("/projects/full")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
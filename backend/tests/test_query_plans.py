@@ -0,0 +1,44 @@
+"""Фильтры по периоду и статусу ищут по своим индексам (EXPLAIN QUERY PLAN)."""
+import pytest
+
+from TaskBase.logic import configure_status_mode
+from TaskBase.query_plans import check_query_plans, explain, full_scans, period_filter_queries, uses_index
+
+EXPECTED = {
+    "filter_tasks_in_period": "ix_tasks_effective_end",
+    "filter_tasks_in_period(past)": "ix_tasks_created_date",
+    "filter_tasks_in_period(status)": "ix_tasks_status_deadline",
+    "get_employee_tasks": "ix_task_executors_employee_id_task_id",
+    "get_filtered_projects": "ix_projects_effective_end",
+    "get_filtered_projects(status)": "ix_projects_status_deadline",
+    "overdue_tasks": "ix_tasks_status_deadline",
+    "overdue_projects": "ix_projects_status_deadline",
+    "completed_tasks": "ix_tasks_completed_date",
+    "get_stage_tasks": "ix_tasks_project_id_stage_id",
+}
+
+
+@pytest.mark.parametrize("name", EXPECTED)
+def test_query_uses_index(session, name):
+    query, index = period_filter_queries(session)[name]
+    assert index == EXPECTED[name]
+    plan = explain(session, query)
+    assert uses_index(plan, index), plan
+    assert not full_scans(plan), plan
+
+
+def test_all_queries_covered(session):
+    assert set(period_filter_queries(session)) == set(EXPECTED)
+    assert check_query_plans(session) == {}
+
+
+def test_period_filter_with_status_on_read(session):
+    # непомеченные просроченные добавляются к effective_end веткой по (status, deadline)
+    configure_status_mode(True)
+    try:
+        plan = explain(session, period_filter_queries(session)["filter_tasks_in_period"][0])
+    finally:
+        configure_status_mode(False)
+    assert uses_index(plan, "ix_tasks_effective_end"), plan
+    assert uses_index(plan, "ix_tasks_status_deadline"), plan
+    assert not full_scans(plan), plan
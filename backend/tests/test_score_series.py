@@ -0,0 +1,32 @@
+"""Ряды баллов: число интервалов ограничено SCORE_SERIES_MAX_BUCKETS."""
+from datetime import date, timedelta
+
+import pytest
+
+from TaskBase.logic import get_department_score_series, series_bucket_count
+from settings import settings
+
+
+@pytest.mark.parametrize("granularity", ["week", "month", "quarter"])
+def test_bucket_count_matches_series(session, granularity):
+    from_date = date(2023, 1, 18)
+    for days in (0, 6, 7, 40, 365, 1000):
+        to_date = from_date + timedelta(days=days)
+        series = get_department_score_series(session, from_date, to_date, granularity)
+        assert series_bucket_count(from_date, to_date, granularity) == len(series)
+
+
+@pytest.mark.parametrize("path", ["/employees/1/score_series", "/projects/1/score_series", "/stats/department_series"])
+def test_too_many_buckets_rejected(client, path):
+    limit = settings.SCORE_SERIES_MAX_BUCKETS
+    from_date = date(2000, 1, 3)  # понедельник
+    last_allowed = from_date + timedelta(weeks=limit - 1)
+
+    response = client.get(path, params={"from_date": from_date, "to_date": last_allowed, "granularity": "week"})
+    assert response.status_code == 200
+    assert len(response.json()) == limit
+
+    response = client.get(path, params={"from_date": from_date, "to_date": last_allowed + timedelta(weeks=1),
+                                        "granularity": "week"})
+    assert response.status_code == 422
+    assert str(limit) in response.json()["detail"]
@@ -100,6 +100,15 @@ export async function getStageTasks(project_id: number, stage_id: number) {
   return res.json();
 }
 
+// Проект целиком: этапы, задачи с исполнителями и баллы — одним запросом
+export async function getProjectFull(id: number, from?: string, to?: string) {
+  const searchParams = new URLSearchParams();
+  if (from) searchParams.append("from_date", from);
+  if (to) searchParams.append("to_date", to);
+  const res = await fetch(`${API_URL}/projects/${id}/full?${searchParams.toString()}`);
+  return res.json();
+}
+
 export async function getProjectName(id: number) {
   const res = await fetch(`${API_URL}/projects/${id}/name`);
   return res.json();
@@ -110,6 +119,13 @@ export async function getProjectScore(id: number, from: string, to: string) {
   return res.json();
 }
 
+// ids не передан — баллы всех проектов одним запросом
+export async function getProjectScores(from: string, to: string, ids?: number[]) {
+  const idsParam = ids ? ids.join(",") : "all";
+  const res = await fetch(`${API_URL}/projects/scores?from_date=${from}&to_date=${to}&ids=${idsParam}`);
+  return res.json();
+}
+
 export async function updateProject(id: number, data: any) {
   const res = await fetch(`${API_URL}/projects/${id}`, {
     method: "PUT",
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
-import type { Project, ProjectStage, Task, Employee } from "../../types";
-import { getProjectStages, getProjectScore, getStageTasks, getAllEmployees } from "../../api";
+import type { Project, ProjectStage, ProjectFull, Task, Employee } from "../../types";
+import { getProjectFull, getProjectScore, getAllEmployees } from "../../api";
 import StageCard from "./StageCard";
 import AddTaskModal from "../modals/AddTaskModal";
 import { formatDate } from "../../utils";
@@ -34,8 +34,9 @@ export default function ProjectCard({
     let mounted = true;
 
     const run = async () => {
+      // развёрнутая карточка получает балл вместе с данными проекта
       if (expanded) await loadData(mounted);
-      await loadScore(mounted);
+      else await loadScore(mounted);
     };
 
     run();
@@ -59,37 +60,27 @@ export default function ProjectCard({
     try {
       setLoadingData(true);
 
-      // 1) Сначала этапы
-      const stageData = await getProjectStages(project.id);
-      if (!mounted) return;
-
-      // 2) Параллельно тянем задачи по всем этапам И список сотрудников
-      const [pairs, employeeData] = await Promise.all([
-        Promise.all(
-          stageData.map(async (s: any) => {
-            const tasks = await getStageTasks(project.id, s.id); // важно: project_id + stage_id
-            return [s.id, tasks] as const;
-          })
-        ),
+      // Этапы, задачи и баллы проекта одним запросом, параллельно — список сотрудников для редактирования
+      const [full, employeeData]: [ProjectFull, Employee[]] = await Promise.all([
+        getProjectFull(project.id, "2000-01-01", "3000-12-31"),
         getAllEmployees(),
       ]);
       if (!mounted) return;
 
-      // 3) Собираем карту задач по этапам
       const taskMap: Record<number, Task[]> = {};
-      for (const [sid, tasks] of pairs) taskMap[sid] = tasks;
+      for (const s of full.stages) taskMap[s.id] = s.tasks;
 
-      // 4) Коммитим в состояние
-      setStages(stageData);
+      setStages(full.stages.map((s) => ({ id: s.id, project_id: s.project_id, name: s.name }) as ProjectStage));
       setTasksByStage(taskMap);
       setEmployees(employeeData);
+      setScore(full.score);
     } finally {
       if (mounted) setLoadingData(false);
     }
   };
 
   const refresh = async () => {
-    await Promise.all([loadData(), loadScore()]);
+    await loadData();
   };
 
   const handleStageToggle = (stageId: number) => {
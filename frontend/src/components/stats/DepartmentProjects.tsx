@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
-import { getProjects, getProjectScore } from "../../api";
-import type { Project } from "../../types";
+import { getProjects, getProjectScores } from "../../api";
+import type { Project, ProjectScoreItem } from "../../types";
 import { getScoreColor, formatDate } from "../../utils";
 
 type Props = {
@@ -17,12 +17,17 @@ export default function DepartmentProjects({ from, to }: Props) {
     if (!from || !to) return;
 
     getProjects({ from_date: from, to_date: to }).then(async (projects: Project[]) => {
-      const scoredProjects: ProjectWithScore[] = await Promise.all(
-        projects.map(async (proj) => {
-          const { score } = await getProjectScore(proj.id, from, to);
-          return { ...proj, score };
-        })
+      // баллы всех проектов — одним пакетным запросом
+      const scores: ProjectScoreItem[] = await getProjectScores(
+        from,
+        to,
+        projects.map((proj) => proj.id)
       );
+      const scoreById = new Map(scores.map((s) => [s.project_id, s.score]));
+      const scoredProjects: ProjectWithScore[] = projects.map((proj) => ({
+        ...proj,
+        score: scoreById.get(proj.id) ?? 0,
+      }));
       setProjects(scoredProjects);
     });
   }, [from, to]);
@@ -39,12 +39,34 @@ export interface Task {
   stage_id?: number | null;
 }
 
+export interface TaskWithExecutors extends Task {
+  executors: { id: number; name: string | null }[];
+}
+
+export interface ProjectStageFull {
+  id: number;
+  project_id: number;
+  name: string;
+  score: number;
+  tasks: TaskWithExecutors[];
+}
+
+export interface ProjectFull extends Project {
+  score: number;
+  stages: ProjectStageFull[];
+}
+
 export interface ScoredEmployee {
   employee_id: number;
   name: string;
   score: number;
 }
 
+export interface ProjectScoreItem {
+  project_id: number;
+  score: number;
+}
+
 export interface DepartmentScore {
   score: number;
 }
@@ -1,36 +1,143 @@
+import asyncio
+import json
 import os
-import requests
 from datetime import date, timedelta
+from urllib.parse import urlencode
+
+import aiohttp
 from dotenv import load_dotenv
 
 API_BASE_URL = os.getenv("API_BASE", "http://127.0.0.1:8080")
-# os.environ["NO_PROXY"] = "localhost,127.0.0.1"
-
-def safe_json_get(url):
-    try:
-        response = requests.get(url, proxies={"http": None, "https": None})
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"[ERROR] {url} — {e}")
-        print(f"[TEXT] {response.text}")
-        return None
-
-def get_all_employees():
-    return safe_json_get(f"{API_BASE_URL}/employees/") or []
-
-def get_employee(employee_id: int):
-    return safe_json_get(f"{API_BASE_URL}/employees/{employee_id}") or {}
-
-def get_employee_rating(employee_id: int, from_date: str, to_date: str):
-    return safe_json_get(
-        f"{API_BASE_URL}/employees/{employee_id}/score?from_date={from_date}&to_date={to_date}"
-    ) or {}
-
-def get_employee_tasks(employee_id: int, from_date: str, to_date: str):
-    return safe_json_get(
-        f"{API_BASE_URL}/employees/{employee_id}/tasks?from_date={from_date}&to_date={to_date}"
-    ) or []
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))
+# тишина в SSE-потоке дольше этого (backend шлёт heartbeat раз в 15 с) — соединение считается оборванным
+API_STREAM_READ_TIMEOUT = float(os.getenv("API_STREAM_READ_TIMEOUT", "60"))
+
+# повторяем только то, что может пройти со второй попытки
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ApiClient:
+    """Async-клиент backend-а: одна aiohttp-сессия на всё время работы бота.
+
+    Соединения переиспользуются (keep-alive пул), у запросов есть таймаут и
+    повторы с экспоненциальной паузой. Одинаковые GET-запросы, которые уже
+    выполняются, не дублируются: все ждущие получают результат одного запроса.
+    """
+
+    def __init__(self, base_url: str, timeout: float = API_TIMEOUT, retries: int = API_RETRIES, pool_size: int = API_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.pool_size = pool_size
+        self._session: aiohttp.ClientSession | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def get_json(self, path: str, **params):
+        """GET с повторами; при ошибке — None (как раньше safe_json_get)."""
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        url = f"{self.base_url}{path}" + (f"?{query}" if query else "")
+
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.ensure_future(self._fetch(url))
+        self._inflight[url] = future
+        future.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, url: str):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._get_session().get(url) as response:
+                    if response.status in RETRY_STATUSES and attempt < self.retries:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                    if response.status >= 400:
+                        print(f"[ERROR] {url} — HTTP {response.status}")
+                        print(f"[TEXT] {await response.text()}")
+                        return None
+                    return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    print(f"[ERROR] {url} — {e!r}")
+                    return None
+                await asyncio.sleep(0.2 * 2 ** attempt)
+
+    async def stream_events(self, path: str, last_event_id: str | None = None, **params):
+        """События SSE-потока: (тип, id, data) по мере поступления.
+
+        Ошибки соединения не перехватываются — переподключается вызывающий,
+        передавая id последнего полученного события.
+        """
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        url = f"{self.base_url}{path}" + (f"?{query}" if query else "")
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=API_STREAM_READ_TIMEOUT)
+
+        async with self._get_session().get(url, headers=headers, timeout=timeout) as response:
+            response.raise_for_status()
+            event, event_id, data = "message", None, []
+            async for raw in response.content:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if line:
+                    name, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if name == "event":
+                        event = value
+                    elif name == "id":
+                        event_id = value
+                    elif name == "data":
+                        data.append(value)
+                    continue
+                # пустая строка завершает событие; комментарии (heartbeat) данных не несут
+                if data:
+                    yield event, event_id, json.loads("\n".join(data))
+                event, event_id, data = "message", None, []
+
+
+api = ApiClient(API_BASE_URL)
+
+
+async def get_all_employees():
+    return await api.get_json("/employees/") or []
+
+async def get_employees_page(limit: int, cursor: str | None = None):
+    """Страница списка сотрудников (keyset-пагинация backend): {"items": [...], "next_cursor": ...}."""
+    return await api.get_json("/employees/", fields="id,name", limit=limit, cursor=cursor)
+
+async def search_employees(query: str, limit: int | None = None):
+    """Полнотекстовый поиск сотрудников (/search): по началу слов, без учёта регистра."""
+    return await api.get_json("/search/", q=query, types="employee", limit=limit) or []
+
+async def get_employee(employee_id: int):
+    return await api.get_json(f"/employees/{employee_id}") or {}
+
+async def get_employee_rating(employee_id: int, from_date: str, to_date: str):
+    return await api.get_json(f"/employees/{employee_id}/score", from_date=from_date, to_date=to_date) or {}
+
+async def get_employee_tasks(employee_id: int, from_date: str, to_date: str):
+    return await api.get_json(f"/employees/{employee_id}/tasks", from_date=from_date, to_date=to_date) or []
+
+async def stream_changes(last_event_id: str | None = None):
+    """Лента изменений backend (/changes/stream) по сотрудникам и задачам."""
+    async for event in api.stream_events("/changes/stream", last_event_id, types="employee,task"):
+        yield event
 
 def get_current_week_dates():
     today = date.today()
@@ -40,4 +147,4 @@ def get_current_week_dates():
 
 def get_current_year_month():
     today = date.today()
-    return today.year, today.month
\ No newline at end of file
+    return today.year, today.month
@@ -1,22 +1,17 @@
 import asyncio
+import html
 import os
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher, types, Router
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.client.default import DefaultBotProperties
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, BotCommand
-from api_client import (
-    get_all_employees,
-    get_employee,
-    get_employee_rating,
-    get_employee_tasks,
-    get_current_week_dates,
-    get_current_year_month,
+from aiogram.types import (
+    InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, BotCommand,
+    InlineQuery, InlineQueryResultArticle, InputTextMessageContent,
 )
-from typing import Any, Mapping
-
-ALLOWED_STATUSES = {"в работе", "просрочено"}
+from api_client import api
+from cards import cached_search, employee_card, employees_page, follow_changes, refresh_cards_forever
 
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN", "_")
@@ -28,12 +23,6 @@ bot = Bot(
 dp = Dispatcher()
 router = Router()
 
-def field(obj, key, default=None):
-    """Безопасно достаём поле как из dict, так и из ORM-объекта."""
-    if isinstance(obj, dict):
-        return obj.get(key, default)
-    return getattr(obj, key, default)
-
 @router.message(Command("start"))
 async def cmd_start(message: types.Message):
     keyboard = InlineKeyboardMarkup(
@@ -49,70 +38,94 @@ async def handle_employees_button(callback: CallbackQuery):
 
 @router.message(Command("employees"))
 async def list_employees(message: types.Message):
-    employees = get_all_employees()
-    if not employees:
+    keyboard = await employees_keyboard(0)
+    if keyboard is None:
         await message.answer("Сотрудников не найдено.")
         return
-
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=emp["name"], callback_data=f"emp_{emp['id']}")]
-            for emp in employees
-        ]
-    )
     await message.answer("Выберите сотрудника:", reply_markup=keyboard)
 
-@router.callback_query(lambda c: c.data.startswith("emp_"))
-async def show_employee_info(callback: CallbackQuery):
-    emp_id = int(callback.data.split("_")[1])
-    emp = get_employee(emp_id)
-    if not emp:
-        await callback.message.answer("Сотрудник не найден.")
-        return
-
-    year, month = get_current_year_month()
-    from_date = f"{year}-{month:02d}-01"
-    to_date = f"{year}-{month:02d}-31"
+@router.callback_query(lambda c: c.data.startswith("page_"))
+async def switch_employees_page(callback: CallbackQuery):
+    keyboard = await employees_keyboard(int(callback.data.split("_")[1]))
+    if keyboard is not None:
+        await callback.message.edit_reply_markup(reply_markup=keyboard)
+    await callback.answer()
 
-    score_data = get_employee_rating(emp_id, from_date, to_date) or {}
-    score = score_data.get("score", "—")
+@router.callback_query(lambda c: c.data == "noop")
+async def ignore_callback(callback: CallbackQuery):
+    await callback.answer()
 
-    start_week, end_week = get_current_week_dates()
-    tasks = get_employee_tasks(emp_id, start_week, end_week) or []
-
-    # показываем только "в работе" и "просрочено"
-    tasks = [t for t in tasks if field(t, "status") in ALLOWED_STATUSES]
+async def employees_keyboard(page: int) -> InlineKeyboardMarkup | None:
+    """Клавиатура одной страницы сотрудников с кнопками «назад» / «вперёд»."""
+    employees, has_next = await employees_page(page)
+    if not employees:
+        return None
 
-    months = [
-        "", "январь", "февраль", "март", "апрель", "май", "июнь",
-        "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь"
+    rows = [
+        [InlineKeyboardButton(text=emp["name"], callback_data=f"emp_{emp['id']}")]
+        for emp in employees
     ]
-    month_name = months[month]
-
-    text = (
-        f"<b>👤 {field(emp,'name','—')}</b>\n"
-        f"<b>📌 Должность:</b> {field(emp,'position','—')}\n"
-        f"<b>📊 Статус:</b> {field(emp,'status','—')}\n"
-        f"<b>🏆 Баллы за {month_name} {year}:</b> <b>{score}</b>\n\n"
-        f"<b>📅 Задачи на текущую неделю:</b>\n"
-    )
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="« Назад", callback_data=f"page_{page - 1}"))
+    if page > 0 or has_next:
+        nav.append(InlineKeyboardButton(text=f"стр. {page + 1}", callback_data="noop"))
+    if has_next:
+        nav.append(InlineKeyboardButton(text="Вперёд »", callback_data=f"page_{page + 1}"))
+    if nav:
+        rows.append(nav)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+@router.inline_query()
+async def inline_search(query: InlineQuery):
+    """Поиск сотрудника по имени: @бот <часть имени>."""
+    text = query.query.strip()
+    employees = await cached_search(text) if text else (await employees_page(0))[0]
+    results = [
+        InlineQueryResultArticle(
+            id=str(emp["id"]),
+            title=emp["name"],
+            description=emp.get("position") or None,
+            input_message_content=InputTextMessageContent(message_text=f"<b>👤 {html.escape(emp['name'])}</b>"),
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="Открыть карточку", callback_data=f"emp_{emp['id']}")]
+            ]),
+        )
+        for emp in employees
+    ]
+    await query.answer(results, cache_time=30)
 
-    if tasks:
-        for t in tasks:
-            text += (
-                f"\n<b>• {field(t,'name','—')}</b>\n"
-                f"🗓️ Дедлайн: {field(t,'deadline','—')}\n"
-                f"📈 Сложность: {field(t,'difficulty','—')}\n"
-                f"📍 Статус: <i>{field(t,'status','—')}</i>\n"
-                f"📝 {field(t,'description','—')}\n"
-            )
-    else:
-        text += "— задач нет"
+@router.callback_query(lambda c: c.data.startswith("emp_"))
+async def show_employee_info(callback: CallbackQuery):
+    emp_id = int(callback.data.split("_")[1])
+    # карточка обычно уже в кэше (прогрев после ночного пересчёта статусов)
+    text = await employee_card(emp_id)
+    if callback.message is None:
+        # кнопка из сообщения, отправленного через inline-поиск
+        if text:
+            await callback.bot.edit_message_text(text, inline_message_id=callback.inline_message_id)
+        await callback.answer(None if text else "Сотрудник не найден.")
+        return
+    if not text:
+        await callback.message.answer("Сотрудник не найден.")
+        return
 
     await callback.message.edit_text(text)
 
 async def main():
     dp.include_router(router)
+    # общая HTTP-сессия клиента backend закрывается вместе с ботом
+    dp.shutdown.register(api.close)
+
+    # фоновый прогрев кэша карточек и сброс по ленте изменений backend
+    refresher = asyncio.create_task(refresh_cards_forever())
+    follower = asyncio.create_task(follow_changes())
+
+    async def stop_refresher():
+        refresher.cancel()
+        follower.cancel()
+
+    dp.shutdown.register(stop_refresher)
 
     await bot.set_my_commands([
         BotCommand(command="start", description="Запуск бота"),
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Кэш с временем жизни записей и LRU-вытеснением.
+
+    get_or_load отдаёт устаревшую запись сразу и обновляет её в фоне, поэтому
+    ответ ждёт backend только если записи нет вовсе.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._refreshing: set = set()
+        # event loop держит на задачи только слабые ссылки — без них фоновое обновление может собрать GC
+        self._tasks: set = set()
+
+    def get(self, key, allow_stale: bool = False):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic() and not allow_stale:
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def is_fresh(self, key) -> bool:
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+
+    def set(self, key, value) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def expire(self, predicate=None) -> None:
+        """Помечает устаревшими записи, ключ которых подходит под predicate (все — без него).
+
+        Запись остаётся: get_or_load отдаст её сразу и обновит в фоне.
+        """
+        for key, (_, value) in list(self._data.items()):
+            if predicate is None or predicate(key):
+                self._data[key] = (0.0, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get_or_load(self, key, loader):
+        """Значение из кэша или loader(); пустые ответы (None, [], {}) не кэшируются."""
+        value = self.get(key, allow_stale=True)
+        if value is not None:
+            if not self.is_fresh(key) and key not in self._refreshing:
+                self._refreshing.add(key)
+                task = asyncio.create_task(self._refresh(key, loader))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value
+        return await self._load(key, loader)
+
+    async def _load(self, key, loader):
+        value = await loader()
+        if value:
+            self.set(key, value)
+        return value
+
+    async def _refresh(self, key, loader):
+        try:
+            await self._load(key, loader)
+        finally:
+            self._refreshing.discard(key)
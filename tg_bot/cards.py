@@ -0,0 +1,225 @@
+import asyncio
+import calendar
+import os
+from datetime import datetime, timedelta
+
+from api_client import (
+    get_all_employees,
+    get_employee,
+    get_employee_rating,
+    get_employee_tasks,
+    get_employees_page,
+    get_current_week_dates,
+    get_current_year_month,
+    search_employees,
+    stream_changes,
+)
+from cache import TTLCache
+
+ALLOWED_STATUSES = {"в работе", "просрочено"}
+MONTHS = [
+    "", "январь", "февраль", "март", "апрель", "май", "июнь",
+    "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь"
+]
+
+# TTL (секунды) и размеры кэшей бота
+employees_cache = TTLCache(ttl=float(os.getenv("BOT_EMPLOYEES_TTL", "300")), maxsize=int(os.getenv("BOT_EMPLOYEES_MAX", "64")))
+scores_cache = TTLCache(ttl=float(os.getenv("BOT_SCORES_TTL", "300")), maxsize=int(os.getenv("BOT_SCORES_MAX", "2048")))
+search_cache = TTLCache(ttl=float(os.getenv("BOT_SEARCH_TTL", "60")), maxsize=int(os.getenv("BOT_SEARCH_MAX", "256")))
+cards_cache = TTLCache(ttl=float(os.getenv("BOT_CARDS_TTL", "600")), maxsize=int(os.getenv("BOT_CARDS_MAX", "2048")))
+
+# прогрев карточек — ночью, когда backend уже пометил просроченными задачи с дедлайном накануне
+WARM_AT = os.getenv("BOT_WARM_AT", "00:20")
+WARM_CONCURRENCY = int(os.getenv("BOT_WARM_CONCURRENCY", "8"))
+# пауза перед переподключением к ленте изменений backend
+CHANGES_RECONNECT_SECONDS = float(os.getenv("BOT_CHANGES_RECONNECT", "3"))
+
+# сотрудников на странице клавиатуры и результатов inline-поиска (Telegram — не больше 50)
+PAGE_SIZE = int(os.getenv("BOT_PAGE_SIZE", "10"))
+INLINE_RESULTS = min(int(os.getenv("BOT_INLINE_RESULTS", "20")), 50)
+
+# курсор backend для каждой уже открытой страницы; в callback_data курсор
+# не помещается (лимит 64 байта), поэтому там только номер страницы
+_page_cursors: dict[int, str | None] = {0: None}
+
+
+def field(obj, key, default=None):
+    """Безопасно достаём поле как из dict, так и из ORM-объекта."""
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+async def cached_employees() -> list:
+    return await employees_cache.get_or_load("all", get_all_employees) or []
+
+
+async def cached_score(emp_id: int, from_date: str, to_date: str) -> dict:
+    return await scores_cache.get_or_load(
+        (emp_id, from_date, to_date), lambda: get_employee_rating(emp_id, from_date, to_date)
+    ) or {}
+
+
+async def employees_page(page: int) -> tuple[list, bool]:
+    """Страница списка сотрудников (page с 0) и признак следующей страницы."""
+    return await employees_cache.get_or_load(("page", page), lambda: _load_page(page)) or ([], False)
+
+
+async def _load_page(page: int):
+    # курсора этой страницы ещё нет (например, после перезапуска) — идём от ближайшей известной
+    known = max(p for p in _page_cursors if p <= page)
+    for current in range(known, page + 1):
+        if current not in _page_cursors:
+            return None
+        data = await get_employees_page(PAGE_SIZE, _page_cursors[current])
+        if data is None:
+            return None
+        if data["next_cursor"]:
+            _page_cursors[current + 1] = data["next_cursor"]
+        if current != page:
+            employees_cache.set(("page", current), (data["items"], bool(data["next_cursor"])))
+    return data["items"], bool(data["next_cursor"])
+
+
+async def cached_search(query: str) -> list:
+    key = query.casefold()
+    return await search_cache.get_or_load(key, lambda: search_employees(query, limit=INLINE_RESULTS)) or []
+
+
+def _card_period():
+    year, month = get_current_year_month()
+    start_week, end_week = get_current_week_dates()
+    return year, month, start_week, end_week
+
+
+async def employee_card(emp_id: int) -> str | None:
+    """Текст карточки сотрудника; None — сотрудник не найден.
+
+    Ключ включает текущие месяц и неделю, так что после их смены карточка
+    собирается заново.
+    """
+    year, month, start_week, _ = _card_period()
+    return await cards_cache.get_or_load((emp_id, year, month, start_week), lambda: render_employee_card(emp_id))
+
+
+async def render_employee_card(emp_id: int) -> str | None:
+    year, month, start_week, end_week = _card_period()
+    from_date = f"{year}-{month:02d}-01"
+    to_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+
+    # три независимых запроса к backend — параллельно
+    emp, score_data, tasks = await asyncio.gather(
+        get_employee(emp_id),
+        cached_score(emp_id, from_date, to_date),
+        get_employee_tasks(emp_id, start_week, end_week),
+    )
+    if not emp:
+        return None
+
+    score = (score_data or {}).get("score", "—")
+    # показываем только "в работе" и "просрочено"
+    tasks = [t for t in tasks or [] if field(t, "status") in ALLOWED_STATUSES]
+
+    text = (
+        f"<b>👤 {field(emp,'name','—')}</b>\n"
+        f"<b>📌 Должность:</b> {field(emp,'position','—')}\n"
+        f"<b>📊 Статус:</b> {field(emp,'status','—')}\n"
+        f"<b>🏆 Баллы за {MONTHS[month]} {year}:</b> <b>{score}</b>\n\n"
+        f"<b>📅 Задачи на текущую неделю:</b>\n"
+    )
+
+    if tasks:
+        for t in tasks:
+            text += (
+                f"\n<b>• {field(t,'name','—')}</b>\n"
+                f"🗓️ Дедлайн: {field(t,'deadline','—')}\n"
+                f"📈 Сложность: {field(t,'difficulty','—')}\n"
+                f"📍 Статус: <i>{field(t,'status','—')}</i>\n"
+                f"📝 {field(t,'description','—')}\n"
+            )
+    else:
+        text += "— задач нет"
+    return text
+
+
+def reset_lists() -> None:
+    employees_cache.clear()
+    search_cache.clear()
+    _page_cursors.clear()
+    _page_cursors[0] = None
+
+
+async def warm_cards() -> int:
+    """Заново собирает кэш: список сотрудников, баллы и карточки всех работающих сотрудников."""
+    reset_lists()
+    scores_cache.clear()
+    employees = await cached_employees()
+    active = [emp for emp in employees if field(emp, "status") != "уволен"]
+
+    year, month, start_week, _ = _card_period()
+    semaphore = asyncio.Semaphore(WARM_CONCURRENCY)
+
+    async def warm(emp_id: int) -> None:
+        async with semaphore:
+            text = await render_employee_card(emp_id)
+        if text:
+            cards_cache.set((emp_id, year, month, start_week), text)
+
+    await asyncio.gather(*(warm(field(emp, "id")) for emp in active))
+    return len(active)
+
+
+def seconds_until(hh_mm: str, now: datetime | None = None) -> float:
+    now = now or datetime.now()
+    hour, minute = map(int, hh_mm.split(":"))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def refresh_cards_forever() -> None:
+    """Прогрев при запуске и затем каждую ночь в WARM_AT."""
+    while True:
+        try:
+            warmed = await warm_cards()
+            print(f"[CACHE] карточки прогреты: {warmed}")
+        except Exception as e:
+            print(f"[ERROR] прогрев карточек — {e!r}")
+        await asyncio.sleep(seconds_until(WARM_AT))
+
+
+def apply_change(event: str, change: dict) -> None:
+    """Событие ленты изменений -> устаревшие записи кэша.
+
+    Карточки и баллы только помечаются устаревшими: их по-прежнему отдают
+    сразу и обновляют в фоне. У события задачи нет id исполнителей, поэтому
+    устаревают все карточки.
+    """
+    if event == "reset" or change.get("entity") == "task":
+        if event == "reset":
+            reset_lists()
+        cards_cache.expire()
+        scores_cache.expire()
+        return
+
+    ids = set(change.get("ids") or ())
+    reset_lists()
+    # пустой ids — изменилось много сотрудников
+    cards_cache.expire(lambda key: not ids or key[0] in ids)
+    scores_cache.expire(lambda key: not ids or key[0] in ids)
+
+
+async def follow_changes() -> None:
+    """Слушает /changes/stream и сбрасывает затронутые записи кэша; после обрыва — переподключение."""
+    last_event_id = None
+    while True:
+        try:
+            async for event, event_id, change in stream_changes(last_event_id):
+                apply_change(event, change)
+                last_event_id = event_id or last_event_id
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ERROR] лента изменений — {e!r}")
+        await asyncio.sleep(CHANGES_RECONNECT_SECONDS)